@@ -1,3 +1,19 @@
 """Import utilities from helper submodule."""
 
 from pyfsmsc.helpfunctions.helper import loadNCAtoms
+from pyfsmsc.helpfunctions.helper import numbaThreads
+from pyfsmsc.helpfunctions.sineTransform import SineTransform
+from pyfsmsc.helpfunctions.sineTransform import dstGrid
+from pyfsmsc.helpfunctions.sineTransform import filonWeights
+from pyfsmsc.helpfunctions.trajectory import Trajectory
+from pyfsmsc.helpfunctions.trajectory import openTrajectory
+from pyfsmsc.helpfunctions.trajectory import prefetchIterator
+from pyfsmsc.helpfunctions.trajectory import selectAtoms
+from pyfsmsc.helpfunctions.trajectoryCache import convertTrajectory
+from pyfsmsc.helpfunctions.trajectoryCache import cachePath
+from pyfsmsc.helpfunctions.trajectoryCache import openCache
+from pyfsmsc.helpfunctions.readers import FrameReader
+from pyfsmsc.helpfunctions.readers import ArrayReader
+from pyfsmsc.helpfunctions.readers import LammpsDumpReader
+from pyfsmsc.helpfunctions.parallel import parallelFrames
+from pyfsmsc.helpfunctions.accumulators import MergeableAccumulator
@@ -0,0 +1,118 @@
+"""Include partial results of trajectory analyses that merge and save exactly."""
+
+import numpy as np
+
+
+class MergeableAccumulator:
+    """Partial sums of a trajectory analysis, merged exactly and saved as .npz.
+
+    The state of an accumulator is its public attributes. The ones named in
+    `summed` add up when the partial results of two parts of a trajectory
+    merge, zero padded along the first axis when one is longer, and every
+    other one describes the analysis and must be equal in both, so values
+    that change along the trajectory, such as the box lengths, are only kept
+    in summed attributes. Subclasses with sums that do not simply add
+    override `combine`. Options that do not change the result, such as
+    thread counts, are private attributes with class level defaults, so they
+    are neither saved nor compared.
+    """
+
+    summed = ()
+
+    def state(self):
+        """Collect the public attributes saved with the accumulator.
+
+        Returns
+        -------
+        state : dict
+            Arrays and numbers of the state by name.
+        """
+        return {
+            name: value
+            for name, value in vars(self).items()
+            if not name.startswith("_")
+        }
+
+    def merge(self, other):
+        """Add the partial sums of another accumulator of the same analysis.
+
+        Parameters
+        ----------
+        other : MergeableAccumulator
+            Accumulator of another part of the trajectory.
+
+        Returns
+        -------
+        self : MergeableAccumulator
+            This accumulator, holding the sums of both.
+        """
+        if type(other) is not type(self):
+            raise TypeError("cannot merge %s into %s" % (type(other), type(self)))
+        mine, theirs = self.state(), other.state()
+        if mine.keys() != theirs.keys():
+            raise ValueError("accumulators must both be started or not")
+        for name, value in mine.items():
+            if name not in self.summed and not np.array_equal(value, theirs[name]):
+                raise ValueError("accumulators differ in %s" % name)
+        self.combine(other)
+        return self
+
+    def combine(self, other):
+        """Add the summed attributes of a checked accumulator, see `merge`."""
+        for name in self.summed:
+            setattr(self, name, padSum(getattr(self, name), getattr(other, name)))
+
+    def save(self, fn):
+        """Write the state to a compressed .npz file.
+
+        Parameters
+        ----------
+        fn : str
+            Path to the .npz file.
+        """
+        np.savez_compressed(fn, **self.state())
+
+    @classmethod
+    def load(cls, fn):
+        """Read an accumulator written by `save`.
+
+        Parameters
+        ----------
+        fn : str
+            Path to the .npz file.
+
+        Returns
+        -------
+        accumulator : MergeableAccumulator
+            Accumulator with the saved state and default options.
+        """
+        accumulator = cls.__new__(cls)
+        with np.load(fn) as data:
+            for name in data.files:
+                value = data[name]
+                setattr(accumulator, name, value.item() if value.ndim == 0 else value)
+        return accumulator
+
+
+def padSum(a, b):
+    """Add two arrays, zero padding the shorter one along the first axis.
+
+    Parameters
+    ----------
+    a : ndarray
+        First array, or number.
+    b : ndarray
+        Second array, or number.
+
+    Returns
+    -------
+    total : ndarray
+        Sum of the arrays, as long as the longer one.
+    """
+    if np.ndim(a) == 0 or np.shape(a) == np.shape(b):
+        return a + b
+    if a.shape[0] < b.shape[0]:
+        a, b = b, a
+    total = a.copy()
+    total[: b.shape[0]] += b
+    return total
@@ -1,9 +1,13 @@
 """Include support utilities for structure calculations."""
 
+import os
+from contextlib import contextmanager
+import numba
 import numpy as np
 import pandas as pd
 import netCDF4 as nc
 from netCDF4 import Dataset
+from pyfsmsc.helpfunctions.trajectory import openTrajectory
 
 
 def loadNCAtoms(fn, frame):
@@ -11,8 +15,8 @@ def loadNCAtoms(fn, frame):
 
     Parameters
     ----------
-    fn : str
-        The path is the netCDF4 trajectory.
+    fn : str or FrameReader
+        The path is the netCDF4 trajectory or LAMMPS dump, or an open `FrameReader`.
     frame : int
         The frame in the netCDF4 trajectory being accessed.
 
@@ -21,16 +25,15 @@ def loadNCAtoms(fn, frame):
     df : pdDataframe
         Atomic coordinates and types of atoms.
     """
-    ds = nc.Dataset(fn)  # read netCDF4
+    with openTrajectory(fn) as traj:  # read netCDF4
+        X = traj.coordinates(frame)  # read the frame once
 
-    ds["coordinates"][frame].shape  # get dimension of data structure
+        posType = np.zeros(
+            (X.shape[0], X.shape[1] + 1)
+        )  # create data structure to write to
 
-    posType = np.zeros(
-        (ds["coordinates"][frame].shape[0], ds["coordinates"][frame].shape[1] + 1)
-    )  # create data structure to write to
-
-    posType[:, 0:3] = ds["coordinates"][frame]  # copy coordinates
-    posType[:, 3] = ds["atom_types"][frame]  # copy atom types
+        posType[:, 0:3] = X  # copy coordinates
+        posType[:, 3] = traj.atomVariable("atom_types", frame)  # copy atom types
 
     df = pd.DataFrame(posType)
 
@@ -39,3 +42,30 @@ def loadNCAtoms(fn, frame):
     df["type"] = df["type"].astype(int)  # convert type to int
 
     return df
+
+
+@contextmanager
+def numbaThreads(nThreads=None):
+    """Temporarily set the number of threads used by parallel numba kernels.
+
+    Parameters
+    ----------
+    nThreads : int
+        Number of threads, falls back to the PYFSMSC_NUM_THREADS environment
+        variable and then to every thread numba can launch when `None`.
+
+    Yields
+    ------
+    nThreads : int
+        Number of threads the kernels will run on.
+    """
+    if nThreads is None:
+        nThreads = os.environ.get("PYFSMSC_NUM_THREADS", numba.config.NUMBA_NUM_THREADS)
+    nThreads = max(1, min(int(nThreads), numba.config.NUMBA_NUM_THREADS))
+
+    previous = numba.get_num_threads()
+    numba.set_num_threads(nThreads)
+    try:
+        yield nThreads
+    finally:
+        numba.set_num_threads(previous)
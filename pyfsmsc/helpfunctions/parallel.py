@@ -0,0 +1,84 @@
+"""Include a process pool driver spreading trajectory frames over workers."""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+from pyfsmsc.helpfunctions.readers import FrameReader
+
+
+def parallelFrames(worker, fn, frames, args=(), nWorkers=1, chunkSize=None):
+    """Run a frame worker on chunks of consecutive frames in worker processes.
+
+    Every worker process opens its own handle on the trajectory and returns a
+    compact partial result of its chunk, the partial results are returned in
+    the order of the chunks, so their reduction does not depend on which
+    process finishes first. Workers are started with "spawn", as the numba
+    thread pool of the calling process does not survive a fork, so scripts
+    need the usual `if __name__ == "__main__":` guard.
+
+    Parameters
+    ----------
+    worker : callable
+        Module level function called as worker(fn, chunk, *args), with `chunk`
+        a range of frames, returning the partial result of the chunk.
+    fn : str or FrameReader
+        Path to the trajectory, or an open `FrameReader`. Worker processes
+        reopen the path of a reader with its `options`, readers without a
+        path, such as an `ArrayReader`, are copied to them.
+    frames : range
+        Frames of the trajectory, see `FrameReader.frames`.
+    args : tuple
+        Further arguments of the worker.
+    nWorkers : int
+        Number of worker processes, `None` for every CPU and 1 to run the
+        chunks in the calling process on `fn` itself.
+    chunkSize : int
+        Number of frames per chunk, defaults to an equal share of every worker.
+
+    Returns
+    -------
+    partials : list
+        Partial result of each chunk, in the order of the frames.
+    """
+    if nWorkers is None:
+        nWorkers = os.cpu_count()
+    if chunkSize is None:
+        chunkSize = max(-(-len(frames) // nWorkers), 1)  # one chunk per worker
+    chunks = [frames[i0:][:chunkSize] for i0 in range(0, len(frames), chunkSize)]
+
+    if nWorkers == 1:
+        return [worker(fn, chunk, *args) for chunk in chunks]
+
+    if isinstance(fn, FrameReader) and hasattr(fn, "fn"):
+        # open handles do not pass between processes, reopen the same source
+        task = partial(openedWorker, worker, partial(type(fn), fn.fn, **fn.options))
+    else:
+        task = partial(worker, fn)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(min(nWorkers, len(chunks)), mp_context=context) as pool:
+        return list(pool.map(task, chunks, *(repeat(a) for a in args)))
+
+
+def openedWorker(worker, opener, chunk, *args):
+    """Run a frame worker on a reader opened in the worker process.
+
+    Parameters
+    ----------
+    worker : callable
+        Frame worker, see `parallelFrames`.
+    opener : callable
+        Opens the reader of the calling process again.
+    chunk : range
+        Frames of the chunk.
+    args : tuple
+        Further arguments of the worker.
+
+    Returns
+    -------
+    partial : object
+        Partial result of the chunk.
+    """
+    with opener() as traj:
+        return worker(traj, chunk, *args)
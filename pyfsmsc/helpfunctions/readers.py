@@ -0,0 +1,679 @@
+"""Include the trajectory reader interface and its array and LAMMPS dump backends."""
+
+import queue
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
+
+
+class FrameReader(ABC):
+    """Frames of a trajectory read through the interface every analysis uses.
+
+    Variables are named like the AMBER netCDF4 trajectories written by LAMMPS,
+    "coordinates", "atom_types", "identifier", "cell_lengths" and "time".
+    Backends implement `readVariable`, `hasVariable` and `hasFrames`, this
+    class builds the frame selection, the caches of box lengths, times,
+    per-atom variables and type indices, and the read ahead of `iterFrames`
+    on top of them. Backends reading a file keep its path in `fn` and their
+    keyword arguments in `options`, so other processes reopen it the same way.
+
+    Parameters
+    ----------
+    nFrames : int
+        Number of frames of the trajectory.
+    nAtoms : int
+        Number of atoms of every frame.
+    staticTypes : bool
+        Every frame stores the same atoms in the same order, so atom types,
+        identifiers and type indices are read once.
+    prefetch : int
+        Number of slabs `iterFrames` reads ahead of the analysis, zero reads
+        every slab when it is needed.
+    slabSize : int
+        Number of frames `iterFrames` reads at once.
+    """
+
+    _prefetcher = None  # read ahead of the running iterFrames
+
+    def __init__(self, nFrames, nAtoms, staticTypes=False, prefetch=2, slabSize=8):
+        """Set up the caches, see the class for the parameters."""
+        self.nFrames = nFrames
+        self.nAtoms = nAtoms
+        self.staticTypes = staticTypes
+        self.prefetch = prefetch
+        self.slabSize = slabSize
+        self._cellLengths = None
+        self._time = None
+        self._atomCache = {}  # (frame, variable) of the last frame read
+        self._indexCache = {}  # (frame, type, ordered) of the last frame read
+
+    def __len__(self):
+        """Count the frames of the trajectory."""
+        return self.nFrames
+
+    def __enter__(self):
+        """Use the trajectory as a context manager."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the trajectory when leaving the context."""
+        self.close()
+
+    def close(self):
+        """Stop the read ahead of `iterFrames`, backends also close their files."""
+        if self._prefetcher is not None:
+            self._prefetcher.close()  # joins the reader thread before files close
+            self._prefetcher = None
+
+    @abstractmethod
+    def readVariable(self, name, index):
+        """Read a variable of one frame or of a slice of frames.
+
+        Parameters
+        ----------
+        name : str
+            Name of the variable.
+        index : int or slice
+            Frame, or slice of frames, of the trajectory. Variables without
+            a frame dimension are read whole with `slice(None)`.
+
+        Returns
+        -------
+        values : ndarray
+            Array of the variable, frames along the first axis of a slice.
+        """
+
+    def readVariables(self, names, index):
+        """Read several variables of one frame or of a slice of frames.
+
+        Backends that decode every variable of a frame at once override this
+        to decode each frame once, see `readVariable` for the parameters.
+
+        Returns
+        -------
+        values : list
+            Arrays of the variables in the order of `names`.
+        """
+        return [self.readVariable(name, index) for name in names]
+
+    @abstractmethod
+    def hasVariable(self, name):
+        """Check whether the trajectory stores a variable."""
+
+    @abstractmethod
+    def hasFrames(self, name):
+        """Check whether a variable is stored for every frame."""
+
+    def frames(self, start=0, stop=None, stride=1):
+        """Select frames like the slice start:stop:stride.
+
+        Parameters
+        ----------
+        start : int
+            First frame.
+        stop : int
+            Frame to stop before, defaults to the end of the trajectory.
+        stride : int
+            Step between frames.
+
+        Returns
+        -------
+        frames : range
+            Frame numbers in the trajectory.
+        """
+        return range(*slice(start, stop, stride).indices(self.nFrames))
+
+    @property
+    def cellLengths(self):
+        """2D array of the box lengths of every frame of `float` type."""
+        if self._cellLengths is None:
+            self._cellLengths = np.asarray(
+                self.readVariable("cell_lengths", slice(None)), dtype=float
+            )
+        return self._cellLengths
+
+    @property
+    def time(self):
+        """1D array of the time of every frame of `float` type."""
+        if self._time is None:
+            self._time = np.asarray(self.readVariable("time", slice(None)), dtype=float)
+        return self._time
+
+    def coordinates(self, frame):
+        """Read the coordinates of every atom of a frame.
+
+        Parameters
+        ----------
+        frame : int
+            Frame of the trajectory.
+
+        Returns
+        -------
+        X : ndarray
+            2D contiguous array containing atomic coordinates of `float` type.
+        """
+        return np.ascontiguousarray(
+            self.readVariable("coordinates", frame), dtype=float
+        )
+
+    def atomVariable(self, name, frame):
+        """Read a per-atom variable, such as `atom_types`, of a frame.
+
+        Parameters
+        ----------
+        name : str
+            Name of the variable.
+        frame : int
+            Frame of the trajectory.
+
+        Returns
+        -------
+        values : ndarray
+            1D array of the variable of every atom, shared with the cache.
+        """
+        key = None if self._isStatic(name) else frame
+        cached = self._atomCache.get(name)
+        if cached is None or cached[0] != key:
+            index = frame if self.hasFrames(name) else slice(None)
+            cached = (key, np.asarray(self.readVariable(name, index)))
+            self._atomCache[name] = cached
+        return cached[1]
+
+    def typeIndices(self, frame, type=None, ordered=False):
+        """Find the atoms of a type in a frame.
+
+        Parameters
+        ----------
+        frame : int
+            Frame of the trajectory.
+        type : int
+            Atom type, defaults to every atom.
+        ordered : bool
+            Order the atoms by identifier, so the same index follows the same
+            atom through frames stored in different orders.
+
+        Returns
+        -------
+        idx : ndarray
+            1D array of the atom indices in the frame of `int` type.
+        """
+        key = (None if self.staticTypes else frame, type, ordered)
+        idx = self._indexCache.get(key)
+        if idx is None:
+            ids = None
+            if ordered and self.hasVariable("identifier"):
+                ids = self.atomVariable("identifier", frame)
+            types = None if type is None else self.atomVariable("atom_types", frame)
+            idx = selectAtoms(self.nAtoms, types, ids, type)
+            if not self.staticTypes:  # keep the indices of one frame only
+                self._indexCache = {
+                    k: v for k, v in self._indexCache.items() if k[0] == frame
+                }
+            self._indexCache[key] = idx
+        return idx
+
+    def positions(self, frame, type=None, ordered=False):
+        """Read the coordinates of the atoms of a type in a frame.
+
+        Parameters
+        ----------
+        frame : int
+            Frame of the trajectory.
+        type : int
+            Atom type, defaults to every atom.
+        ordered : bool
+            Order the atoms by identifier, see `typeIndices`.
+
+        Returns
+        -------
+        X : ndarray
+            2D contiguous array containing atomic coordinates of `float` type.
+        """
+        X = self.coordinates(frame)
+        if type is None and not ordered:
+            return X
+        return X[self.typeIndices(frame, type, ordered)]
+
+    def iterFrames(self, frames, type=None, ordered=False):
+        """Iterate over the atoms of a type in frames read ahead of the analysis.
+
+        A background thread reads `slabSize` frames at a time, as one slab of
+        each variable, and keeps at most `prefetch` slabs waiting, so reading
+        overlaps the analysis of the current frame with bounded memory. The
+        trajectory must not be read elsewhere until the iteration ends, and
+        closing the trajectory stops the thread of an unfinished iteration.
+
+        Parameters
+        ----------
+        frames : range
+            Frames of the trajectory, see `frames`.
+        type : int
+            Atom type, defaults to every atom.
+        ordered : bool
+            Order the atoms by identifier, see `typeIndices`.
+
+        Yields
+        ------
+        frame : int
+            Frame of the trajectory.
+        X : ndarray
+            2D contiguous array containing atomic coordinates of `float` type.
+        """
+        perFrame = []  # per-atom variables read with every slab
+        types = ids = idx = None  # static ones are read before the reader thread
+        if type is not None:
+            if self._isStatic("atom_types"):
+                types = self.atomVariable("atom_types", frames[0])
+            else:
+                perFrame.append("atom_types")
+        if ordered and self.hasVariable("identifier"):
+            if self._isStatic("identifier"):
+                ids = self.atomVariable("identifier", frames[0])
+            else:
+                perFrame.append("identifier")
+        if not perFrame and (type is not None or ordered):
+            idx = selectAtoms(self.nAtoms, types, ids, type)
+        # the reader thread shares the file handle, so read the boxes and
+        # times the caller may use while iterating before it starts
+        self._cellLengths = self.cellLengths
+        if self.hasVariable("time"):
+            self._time = self.time
+        names = ["coordinates"] + perFrame
+
+        def read(slab):
+            if isinstance(slab, range):  # one hyperslab of each variable
+                index = slice(slab.start, slab[-1] + 1, slab.step)
+                return self.readVariables(names, index)
+            values = [self.readVariables(names, f) for f in slab]
+            return [np.stack(items) for items in zip(*values)]
+
+        slabs = [
+            frames[i0:][: self.slabSize] for i0 in range(0, len(frames), self.slabSize)
+        ]
+        prefetcher = prefetchIterator(slabs, read, self.prefetch)
+        self._prefetcher = prefetcher  # stopped by close when the loop breaks off
+        try:
+            for slab, data in prefetcher:
+                coords = np.asarray(data[0], dtype=float)
+                for k, frame in enumerate(slab):
+                    if perFrame:
+                        values = dict(zip(perFrame, (item[k] for item in data[1:])))
+                        idx = selectAtoms(
+                            self.nAtoms,
+                            values.get("atom_types", types),
+                            values.get("identifier", ids),
+                            type,
+                        )
+                    yield frame, coords[k] if idx is None else coords[k][idx]
+        finally:
+            prefetcher.close()
+            if self._prefetcher is prefetcher:
+                self._prefetcher = None
+
+    def _isStatic(self, name):
+        """Check whether a per-atom variable is the same in every frame."""
+        return not self.hasFrames(name) or (
+            self.staticTypes and name in ("atom_types", "identifier")
+        )
+
+
+def selectAtoms(nAtoms, types=None, ids=None, type=None):
+    """Select the atoms of a type, optionally ordered by identifier.
+
+    Parameters
+    ----------
+    nAtoms : int
+        Number of atoms in the frame.
+    types : ndarray
+        1D array of the type of every atom, only needed with `type`.
+    ids : ndarray
+        1D array of the identifier of every atom, keeps the storage order when `None`.
+    type : int
+        Atom type, defaults to every atom.
+
+    Returns
+    -------
+    idx : ndarray
+        1D array of the atom indices in the frame of `int` type.
+    """
+    idx = np.arange(nAtoms) if ids is None else np.argsort(ids, kind="stable")
+    if type is not None:
+        idx = idx[types[idx] == type]
+    return idx
+
+
+def prefetchIterator(items, read, depth=2):
+    """Read items in a background thread while the caller processes earlier ones.
+
+    Parameters
+    ----------
+    items : list
+        Items to read, in order.
+    read : callable
+        Function reading one item.
+    depth : int
+        Largest number of read items waiting for the caller, zero reads every
+        item in the calling thread when it is needed.
+
+    Yields
+    ------
+    item : object
+        Item from `items`.
+    data : object
+        Result of `read` on the item.
+    """
+    if depth <= 0:
+        for item in items:
+            yield item, read(item)
+        return
+
+    waiting = queue.Queue(maxsize=depth)  # bounded, the reader blocks when full
+    stop = threading.Event()
+
+    def put(value):
+        while not stop.is_set():
+            try:
+                waiting.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False  # the caller stopped iterating
+
+    def reader():
+        try:
+            for item in items:
+                if not put((item, read(item), None)):
+                    return
+        except BaseException as exc:  # raised again in the calling thread
+            put((None, None, exc))
+            return
+        put(None)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            value = waiting.get()
+            if value is None:
+                break
+            item, data, exc = value
+            if exc is not None:
+                raise exc
+            yield item, data
+    finally:
+        stop.set()  # also releases a reader blocked on the full queue
+        thread.join()
+
+
+class ArrayReader(FrameReader):
+    """Trajectory held in memory arrays, read without copies.
+
+    Frames are views of the given arrays, so a simulation can hand its
+    current positions to any analysis without writing them to a file. Arrays
+    that are already contiguous and of `float` type are never copied.
+
+    Parameters
+    ----------
+    coordinates : ndarray
+        3D array containing the atomic coordinates of every frame, or 2D array
+        of a single frame, of `float` type.
+    cellLengths : ndarray
+        2D array of the box lengths of every frame, or 1D array of the box
+        lengths shared by every frame, of `float` type.
+    atomTypes : ndarray
+        2D array of the type of every atom in every frame, or 1D array of the
+        type of every atom in all frames, of `int` type. Defaults to type 1.
+    identifiers : ndarray
+        2D array of the identifier of every atom in every frame, or 1D array
+        shared by every frame, of `int` type. Defaults to the storage order.
+    time : ndarray
+        1D array containing the time of every frame of `float` type, defaults
+        to the frame numbers.
+    variables : dict
+        Further per-atom variables by name, such as "c_clst", each a 2D array
+        of every frame or a 1D array shared by every frame.
+    prefetch : int
+        Number of slabs `iterFrames` reads ahead, see `FrameReader`.
+    slabSize : int
+        Number of frames `iterFrames` reads at once.
+    """
+
+    def __init__(
+        self,
+        coordinates,
+        cellLengths,
+        atomTypes=None,
+        identifiers=None,
+        time=None,
+        variables=None,
+        prefetch=0,
+        slabSize=8,
+    ):
+        """Wrap the arrays, see the class for the parameters."""
+        coordinates = np.asarray(coordinates)
+        if coordinates.ndim == 2:
+            coordinates = coordinates[None]  # a single frame
+        nFrames, nAtoms = coordinates.shape[:2]
+        if atomTypes is None:
+            atomTypes = np.ones(nAtoms, dtype=np.int32)
+        if time is None:
+            time = np.arange(nFrames, dtype=float)
+
+        self.arrays = {
+            "coordinates": coordinates,
+            "cell_lengths": np.broadcast_to(cellLengths, (nFrames, 3)),
+            "time": np.asarray(time),
+            "atom_types": np.asarray(atomTypes),
+        }
+        if identifiers is not None:
+            self.arrays["identifier"] = np.asarray(identifiers)
+        for name, values in (variables or {}).items():
+            self.arrays[name] = np.asarray(values)
+
+        staticTypes = not (self.hasFrames("atom_types") or self.hasFrames("identifier"))
+        super().__init__(nFrames, nAtoms, staticTypes, prefetch, slabSize)
+
+    def readVariable(self, name, index):
+        """Read a view of an array, see `FrameReader.readVariable`."""
+        return self.arrays[name][index]
+
+    def hasVariable(self, name):
+        """Check whether an array of the variable was given."""
+        return name in self.arrays
+
+    def hasFrames(self, name):
+        """Check whether an array is given for every frame."""
+        if name in ("coordinates", "cell_lengths", "time"):
+            return True
+        return name in self.arrays and self.arrays[name].ndim == 2
+
+
+class LammpsDumpReader(FrameReader):
+    """Trajectory in a LAMMPS text dump, parsed one frame at a time.
+
+    Opening the file scans it once for the byte offset, timestep and box of
+    every frame, so frames are then read in any order without holding more
+    than one frame in memory. The columns "id" and "type" are read as the
+    "identifier" and "atom_types" variables, the coordinates from the first
+    of the x y z, xu yu zu, xs ys zs or xsu ysu zsu column triples, and every
+    other numeric column under its own name as `float` type. Dumps without a
+    "type" column have atoms of type 1, like `ArrayReader`. Every frame must
+    have the same columns and number of atoms in an orthogonal box.
+
+    Parameters
+    ----------
+    fn : str
+        Path to the LAMMPS dump.
+    timestep : float
+        Time of one timestep, the time of a frame is its timestep times this
+        unless the dump stores the time of every frame.
+    staticTypes : bool
+        Every frame stores the same atoms in the same order, as written with
+        `dump_modify sort id`, see `FrameReader`.
+    prefetch : int
+        Number of slabs `iterFrames` reads ahead of the analysis.
+    slabSize : int
+        Number of frames `iterFrames` reads at once.
+    """
+
+    def __init__(self, fn, timestep=1.0, staticTypes=False, prefetch=2, slabSize=8):
+        """Index the frames of the dump, see the class for the parameters."""
+        self.fn = fn
+        self.options = dict(
+            timestep=timestep,
+            staticTypes=staticTypes,
+            prefetch=prefetch,
+            slabSize=slabSize,
+        )
+        self.file = open(fn, "rb")
+        try:
+            steps, times, lo, hi, nAtoms = self._indexFrames()
+        except BaseException:
+            self.file.close()
+            raise
+
+        if len(times) != len(steps):
+            times = np.array(steps, dtype=float) * timestep
+        self.frameInfo = {
+            "Timestep": np.array(steps, dtype=np.int64),
+            "time": np.array(times, dtype=float),
+            "cell_origin": np.array(lo),
+            "cell_lengths": np.array(hi) - np.array(lo),
+        }
+        self._table = (None, None)  # (frame, columns) of the last frame parsed
+        super().__init__(len(self.offsets), nAtoms, staticTypes, prefetch, slabSize)
+
+    def close(self):
+        """Stop the read ahead and close the dump file."""
+        super().close()
+        self.file.close()
+
+    def readVariable(self, name, index):
+        """Parse a variable of a frame, see `FrameReader.readVariable`."""
+        if name in self.frameInfo:
+            return self.frameInfo[name][index]
+        if not isinstance(index, (int, np.integer)):
+            return self.readVariables([name], index)[0]
+        if name == "atom_types" and "type" not in self.columns:
+            return np.ones(self.nAtoms, dtype=np.int32)  # same as ArrayReader
+
+        table = self._parseFrame(index)
+        if name == "coordinates":
+            X = table[:, self.coordinateColumns]
+            if self.scaled:  # fractional coordinates of the box
+                X = self.frameInfo["cell_origin"][index] + X * (
+                    self.frameInfo["cell_lengths"][index]
+                )
+            return X
+        if name == "identifier":
+            return table[:, self.columns["id"]].astype(np.int64)
+        if name == "atom_types":
+            return table[:, self.columns["type"]].astype(np.int32)
+        return table[:, self.columns[name]]
+
+    def readVariables(self, names, index):
+        """Parse each frame once for every variable, see `FrameReader.readVariables`."""
+        if isinstance(index, (int, np.integer)):
+            return [self.readVariable(name, index) for name in names]  # one parse
+        values = [self.readVariables(names, f) for f in range(self.nFrames)[index]]
+        return [np.stack(items) for items in zip(*values)]
+
+    def hasVariable(self, name):
+        """Check whether the dump stores a variable."""
+        column = {"identifier": "id"}.get(name, name)
+        return (
+            name in ("coordinates", "atom_types")
+            or name in self.frameInfo
+            or column in self.columns
+        )
+
+    def hasFrames(self, name):
+        """Check whether a variable is stored for every frame, always true."""
+        return True
+
+    def _indexFrames(self):
+        """Scan the dump for the offset, timestep and box of every frame."""
+        self.offsets = []  # byte offset of the atom lines of each frame
+        steps, times, lo, hi = [], [], [], []
+        nAtoms = columns = n = None
+
+        while True:
+            line = self.file.readline()
+            if not line:
+                break
+            if not line.startswith(b"ITEM:"):
+                raise ValueError("%s is not a LAMMPS dump" % self.fn)
+            item = line.decode().split()[1:]
+            if item[0] == "TIMESTEP":
+                steps.append(int(self.file.readline()))
+            elif item[0] == "TIME":  # written with dump_modify time yes
+                times.append(float(self.file.readline()))
+            elif item[0] == "UNITS":
+                self.file.readline()
+            elif item[0] == "NUMBER":
+                n = int(self.file.readline())
+            elif item[0] == "BOX":
+                if "xy" in item:
+                    raise ValueError("triclinic boxes are not supported")
+                bounds = [self.file.readline().split() for _ in range(3)]
+                lo.append([float(b[0]) for b in bounds])
+                hi.append([float(b[1]) for b in bounds])
+            elif item[0] == "ATOMS":
+                if n is None:
+                    raise ValueError(
+                        "frame %d lists its atoms before their number"
+                        % len(self.offsets)
+                    )
+                if columns is None:
+                    nAtoms, columns = n, item[1:]
+                elif n != nAtoms or item[1:] != columns:
+                    raise ValueError("every frame must have the same atoms and columns")
+                self.offsets.append(self.file.tell())
+                for _ in range(n):
+                    self.file.readline()
+                n = None  # every frame gives its number of atoms
+            else:
+                raise ValueError("unknown dump item %s" % " ".join(item))
+        if not self.offsets:
+            raise ValueError("%s has no frames" % self.fn)
+
+        self.columns = {name: k for k, name in enumerate(columns)}
+        self.coordinateColumns = None
+        for suffix in ("", "u", "s", "su"):
+            if all(c + suffix in self.columns for c in "xyz"):
+                self.coordinateColumns = [self.columns[c + suffix] for c in "xyz"]
+                self.scaled = suffix.startswith("s")
+                break
+        if self.coordinateColumns is None:
+            raise ValueError("the dump stores no coordinates")
+        self.numeric = [k for k, name in enumerate(columns) if name != "element"]
+
+        return steps, times, lo, hi, nAtoms
+
+    def _parseFrame(self, frame):
+        """Parse the numeric columns of the atom lines of a frame."""
+        if self._table[0] != frame:
+            self.file.seek(self.offsets[frame])
+            table = np.zeros((self.nAtoms, len(self.columns)))
+            table[:, self.numeric] = np.loadtxt(
+                self.file, usecols=self.numeric, max_rows=self.nAtoms, ndmin=2
+            )
+            self._table = (frame, table)
+        return self._table[1]
+
+
+def isLammpsDump(fn):
+    """Check whether a file is a LAMMPS text dump.
+
+    Parameters
+    ----------
+    fn : str
+        Path to the trajectory.
+
+    Returns
+    -------
+    dump : bool
+        The file starts like a LAMMPS dump.
+    """
+    with open(fn, "rb") as f:
+        return f.read(5) == b"ITEM:"
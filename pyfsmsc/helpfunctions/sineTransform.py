@@ -0,0 +1,196 @@
+"""Include a precomputed radial Fourier (sine) transform between two grids."""
+
+import numpy as np
+import scipy.fft
+from scipy.interpolate import CubicSpline
+
+
+class SineTransform:
+    """Radial Fourier transform of curves sampled on a fixed grid.
+
+    The transform sum of dx x sin(k x) f(x) / k is a matrix between the input
+    grid `x` and the output grid `k`. The matrix is built once, so every
+    later curve, or stack of curves, costs a single matrix product.
+
+    The "filon" method instead integrates x f(x) interpolated linearly between
+    the grid points against the exact sin(k x), from x = 0 to the last point,
+    which stays accurate where k dx is large and allows non-uniform grids.
+
+    When `x` starts at a whole or half multiple of its spacing the same sum
+    is a type I or type II discrete sine transform on the zero padded input,
+    which is evaluated with FFTs in O(n log n) and interpolated to `k` with
+    a cubic spline, to a relative error of about 1e-8 with the default
+    padding.
+
+    Parameters
+    ----------
+    x : ndarray
+        1D array containing the increasing input grid, r or q, of `float` type,
+        uniform except for the "filon" method.
+    k : ndarray
+        1D array containing the output grid, q or r, of `float` type.
+    method : str
+        "dense" for the matrix, "dst" for the sine transform, "filon" for the
+        matrix of Filon weights or "auto" for the sine transform when the
+        grids allow it and the matrix would have at least `minSize` entries,
+        else the matrix.
+    window : str
+        "lorch" to damp the truncation ripples with the Lorch window
+        sin(pi x / x_max) / (pi x / x_max), defaults to no window.
+    pad : int
+        Factor the sine transform is zero padded by, sets the spacing of the
+        points the spline interpolates.
+    minSize : int
+        Smallest matrix size the "auto" method uses the sine transform for.
+    """
+
+    def __init__(self, x, k, method="auto", window=None, pad=16, minSize=1000000):
+        """Build the transform, see the class for the parameters."""
+        if method not in ("auto", "dense", "dst", "filon"):
+            raise ValueError("method must be 'auto', 'dense', 'dst' or 'filon'")
+        if window not in (None, "lorch"):
+            raise ValueError("window must be None or 'lorch'")
+        self.x = np.asarray(x, dtype=float)
+        self.k = np.asarray(k, dtype=float)
+        dx = self.x[1] - self.x[0]  # rectangle rule spacing
+
+        self.weights = self.x.copy()  # x of the integrand x f(x)
+        if window == "lorch":
+            self.weights *= np.sinc(self.x / self.x[-1])
+
+        dstType, shift = dstGrid(self.x, self.k)
+        if method == "dst" and dstType is None:
+            raise ValueError("grids are not compatible with a sine transform")
+        if method == "auto" and self.x.shape[0] * self.k.shape[0] < minSize:
+            dstType = None
+
+        self.method = method if method in ("dense", "filon") else "dst"
+        if self.method == "dst" and dstType is None:
+            self.method = "dense"
+        if self.method == "filon":
+            self.kernel = self.weights[:, None] * filonWeights(self.x, self.k) / self.k
+            return
+        self.weights *= dx
+        if self.method == "dense":
+            self.kernel = (
+                self.weights[:, None] * np.sin(np.outer(self.x, self.k)) / self.k
+            )  # (input, output) so curves multiply from the left
+            return
+
+        self.dstType = dstType
+        self.shift = shift
+        dx = (self.x[-1] - self.x[0]) / (self.x.shape[0] - 1)
+        n = scipy.fft.next_fast_len(pad * (self.x.shape[0] + shift))
+        self.size = n - 1 if dstType == 1 else n  # type I transforms n - 1 points
+        self.kGrid = np.pi * np.arange(1, self.size + 1) / (n * dx)
+        self.nSpline = min(np.searchsorted(self.kGrid, self.k.max()) + 4, self.size)
+
+    def apply(self, f):
+        """Transform one curve or a stack of curves.
+
+        Parameters
+        ----------
+        f : ndarray
+            1D array of one curve, or 2D array of a curve in each row, sampled
+            on `x` of `float` type.
+
+        Returns
+        -------
+        F : ndarray
+            Array of the transformed curves sampled on `k` of `float` type.
+        """
+        f = np.asarray(f, dtype=float)
+        if self.method != "dst":
+            return f @ self.kernel
+
+        padded = np.zeros(f.shape[:-1] + (self.size,))
+        padded[..., self.shift + np.arange(self.x.shape[0])] = f * self.weights
+        s = scipy.fft.dst(padded, type=self.dstType, axis=-1) / 2
+
+        # the sine sum vanishes at k = 0, which anchors the spline
+        kGrid = np.concatenate(([0.0], self.kGrid[: self.nSpline]))
+        s = np.concatenate(
+            (np.zeros(f.shape[:-1] + (1,)), s[..., : self.nSpline]), axis=-1
+        )
+        return CubicSpline(kGrid, s, axis=-1)(self.k) / self.k
+
+
+def dstGrid(x, k):
+    """Find the discrete sine transform matching a pair of grids.
+
+    Parameters
+    ----------
+    x : ndarray
+        1D array containing the input grid of `float` type.
+    k : ndarray
+        1D array containing the output grid of `float` type.
+
+    Returns
+    -------
+    dstType : int
+        1 when `x` starts at a whole multiple of its spacing, 2 at a half
+        multiple, `None` when the grids need the dense matrix.
+    shift : int
+        Number of zeros padded in front of the input.
+    """
+    dx = (x[-1] - x[0]) / (x.shape[0] - 1)  # mean spacing absorbs rounded grids
+    if not np.allclose(np.diff(x), dx, rtol=1e-3, atol=0):
+        return None, 0  # non-uniform input
+    if np.min(k) <= 0 or np.max(k) > np.pi / dx:
+        return None, 0  # outside the unaliased range of the sum
+    s = x[0] / dx
+    if s >= 0.5 and np.isclose(s, np.rint(s), rtol=0, atol=1e-3):
+        return 1, int(np.rint(s)) - 1  # x = (j + 1) dx
+    if s >= 0 and np.isclose(s - 0.5, np.rint(s - 0.5), rtol=0, atol=1e-3):
+        return 2, int(np.rint(s - 0.5))  # x = (j + 1 / 2) dx
+    return None, 0
+
+
+def filonWeights(x, k):
+    """Compute Filon weights of sin(k x) for a piecewise linear integrand.
+
+    The integral from zero to x[-1] of g(x) sin(k x), with g linear between
+    the points of `x` and g(0) = 0, is the sum of the weights times g(x).
+    Each interval of width h contributes h Im[exp(i k a) A(k h)] to its left
+    point a and h Im[exp(i k a) B(k h)] to its right point, with A and B the
+    integrals of (1 - t) exp(i k h t) and t exp(i k h t) over 0 < t < 1.
+
+    Parameters
+    ----------
+    x : ndarray
+        1D array containing the increasing positive grid points of `float` type.
+    k : ndarray
+        1D array containing the wavenumbers of `float` type.
+
+    Returns
+    -------
+    W : ndarray
+        2D array containing the weight of each grid point in rows and
+        wavenumber in columns of `float` type.
+    """
+    x = np.asarray(x, dtype=float)
+    k = np.asarray(k, dtype=float)
+    nodes = x if x[0] == 0 else np.concatenate(([0.0], x))  # prepend the origin
+    h = np.diff(nodes)[:, None]
+    theta = h * k
+    phase = np.exp(1j * nodes[:-1, None] * k)  # exp(i k a) of each interval
+
+    A = np.zeros(theta.shape, dtype=np.complex128)
+    B = np.zeros(theta.shape, dtype=np.complex128)
+    small = np.abs(theta) < 1  # the closed forms cancel at small k h
+    t = theta[small]
+    term = np.ones(t.shape, dtype=np.complex128)
+    for n in range(17):  # series in (i theta)^n / n!
+        A[small] += term / ((n + 1) * (n + 2))
+        B[small] += term / (n + 2)
+        term = term * 1j * t / (n + 1)
+    t = theta[~small]
+    e = np.exp(1j * t)
+    B[~small] = e / (1j * t) + (e - 1) / t**2
+    A[~small] = (e - 1) / (1j * t) - B[~small]
+
+    W = np.zeros((nodes.shape[0], k.shape[0]))
+    W[:-1] += (h * phase * A).imag  # left point of each interval
+    W[1:] += (h * phase * B).imag  # right point of each interval
+
+    return W[1:] if nodes.shape[0] > x.shape[0] else W  # drop the origin
@@ -0,0 +1,115 @@
+"""Include a persistent handle on netCDF4 trajectories."""
+
+from contextlib import contextmanager
+from netCDF4 import Dataset
+from pyfsmsc.helpfunctions.readers import FrameReader, LammpsDumpReader, isLammpsDump
+from pyfsmsc.helpfunctions.readers import prefetchIterator, selectAtoms
+from pyfsmsc.helpfunctions.trajectoryCache import CacheDataset, openCache
+
+
+class Trajectory(FrameReader):
+    """Open netCDF4 trajectory read through a single Dataset.
+
+    Frames are returned as plain contiguous `float` arrays instead of masked
+    arrays. Box lengths and times are read once for every frame, and the
+    per-atom variables and type indices of the last frame are cached, or of
+    the whole trajectory when the atom types are static. Loops over frames
+    read ahead in a background thread, see `iterFrames`. A cache written by
+    `convertTrajectory` is memory-mapped instead of the file whenever it is
+    present and up to date.
+
+    Parameters
+    ----------
+    fn : str
+        Path to the netCDF4 trajectory.
+    staticTypes : bool
+        Every frame stores the same atoms in the same order, so atom types,
+        identifiers and type indices are read once. Defaults to the check made
+        by the cache, else to `True` only when `atom_types` has no frame
+        dimension.
+    prefetch : int
+        Number of slabs `iterFrames` reads ahead of the analysis, zero reads
+        every slab when it is needed.
+    slabSize : int
+        Number of frames `iterFrames` reads from the file at once.
+    cache : bool
+        Use the memory-mapped cache of the trajectory when there is one.
+    cacheDir : str
+        Directory holding the caches, see `cachePath`.
+    """
+
+    def __init__(
+        self, fn, staticTypes=None, prefetch=2, slabSize=8, cache=True, cacheDir=None
+    ):
+        """Open the trajectory, see the class for the parameters."""
+        self.fn = fn
+        self.options = dict(
+            staticTypes=staticTypes,
+            prefetch=prefetch,
+            slabSize=slabSize,
+            cache=cache,
+            cacheDir=cacheDir,
+        )
+        self.ds = openCache(fn, cacheDir) if cache else None
+        if self.ds is None:
+            self.ds = Dataset(fn)
+            self.ds.set_auto_mask(False)  # plain arrays instead of masked arrays
+        if staticTypes is None and isinstance(self.ds, CacheDataset):
+            staticTypes = self.ds.staticTypes
+        if staticTypes is None:
+            staticTypes = not self.hasFrames("atom_types")
+        nFrames, nAtoms = self.ds["coordinates"].shape[:2]
+        super().__init__(nFrames, nAtoms, staticTypes, prefetch, slabSize)
+
+    def close(self):
+        """Stop the read ahead and close the underlying Dataset."""
+        super().close()
+        if self.ds.isopen():
+            self.ds.close()
+
+    def readVariable(self, name, index):
+        """Read a netCDF4 variable, see `FrameReader.readVariable`."""
+        return self.ds[name][index]
+
+    def hasVariable(self, name):
+        """Check whether the file stores a variable."""
+        return name in self.ds.variables
+
+    def hasFrames(self, name):
+        """Check whether a variable has a frame dimension."""
+        return "frame" in self.ds[name].dimensions
+
+    def typeIndices(self, frame, type=None, ordered=False):
+        """Find the atoms of a type in a frame, see `FrameReader.typeIndices`."""
+        key = (None, type, ordered)
+        static = self.staticTypes and type is not None and not ordered
+        if static and isinstance(self.ds, CacheDataset) and key not in self._indexCache:
+            idx = self.ds.typeIndex(type)  # stored by the conversion
+            if idx is not None:
+                self._indexCache[key] = idx
+        return super().typeIndices(frame, type, ordered)
+
+
+@contextmanager
+def openTrajectory(fn):
+    """Open a trajectory path, or pass an open reader through.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to a netCDF4 trajectory or LAMMPS dump, or an open reader such
+        as a `Trajectory` or `ArrayReader` that is left open for the caller.
+
+    Yields
+    ------
+    traj : FrameReader
+        Open trajectory, closed on exit when it was opened here.
+    """
+    if isinstance(fn, FrameReader):
+        yield fn
+        return
+    traj = LammpsDumpReader(fn) if isLammpsDump(fn) else Trajectory(fn)
+    try:
+        yield traj
+    finally:
+        traj.close()
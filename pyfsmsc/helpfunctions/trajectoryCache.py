@@ -0,0 +1,217 @@
+"""Include a memory-mapped cache of netCDF4 trajectories for repeated analysis."""
+
+import json
+import os
+import numpy as np
+from netCDF4 import Dataset
+
+
+def convertTrajectory(fn, cacheDir=None, dtype="float64", slabSize=64):
+    """Convert a netCDF4 trajectory into a directory of memory-mappable arrays.
+
+    Every numeric variable is written to its own `.npy` file, so later reads
+    are memory-mapped slices without netCDF4 decoding or masked arrays. When
+    the atom types are static, stored once or the same in every frame, the
+    atom indices of each type are written as well. The manifest records
+    the size and modification time of the source file, a cache that no
+    longer matches its source is ignored by `openCache`.
+
+    Parameters
+    ----------
+    fn : str
+        Path to the netCDF4 trajectory.
+    cacheDir : str
+        Directory holding the caches, see `cachePath`.
+    dtype : str
+        Type of the cached coordinates, "float64" or "float32" to halve the
+        cache at the cost of precision.
+    slabSize : int
+        Number of frames converted at once.
+
+    Returns
+    -------
+    path : str
+        Path to the cache directory.
+    """
+    path = cachePath(fn, cacheDir)
+    os.makedirs(path, exist_ok=True)
+    manifestPath = os.path.join(path, "manifest.json")
+    if os.path.exists(manifestPath):
+        os.remove(manifestPath)  # an interrupted conversion leaves no valid cache
+
+    ds = Dataset(fn)
+    ds.set_auto_mask(False)  # plain arrays instead of masked arrays
+    variables = {}
+    for name, var in ds.variables.items():
+        if var.dtype.kind not in "biuf":
+            continue  # labels
+        cacheType = np.dtype(dtype) if name == "coordinates" else var.dtype
+        out = np.lib.format.open_memmap(
+            os.path.join(path, name + ".npy"), "w+", cacheType, var.shape
+        )
+        if "frame" not in var.dimensions:
+            out[...] = var[...]  # static variables, such as atom_types on atoms
+        else:
+            for f0 in range(0, var.shape[0], slabSize):
+                slab = slice(f0, f0 + slabSize)  # bounded memory
+                out[slab] = var[slab]
+        out.flush()
+        variables[name] = list(var.dimensions)
+
+    staticTypes = "atom_types" in variables
+    for name in ("atom_types", "identifier"):  # same atoms in every frame
+        if staticTypes and "frame" in variables.get(name, ()):
+            values = np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+            for f0 in range(0, values.shape[0], slabSize):
+                slab = slice(f0, f0 + slabSize)
+                staticTypes = staticTypes and bool(np.all(values[slab] == values[0]))
+    if staticTypes:
+        types = np.load(os.path.join(path, "atom_types.npy"), mmap_mode="r")
+        if "frame" in variables["atom_types"]:
+            types = types[0]
+        for type in np.unique(types):
+            np.save(
+                os.path.join(path, "type%d.npy" % type), np.flatnonzero(types == type)
+            )
+    ds.close()
+
+    stat = os.stat(fn)
+    manifest = {
+        "source": os.path.abspath(fn),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "variables": variables,
+        "staticTypes": staticTypes,
+    }
+    with open(manifestPath + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(manifestPath + ".tmp", manifestPath)  # written last, when complete
+
+    return path
+
+
+def cachePath(fn, cacheDir=None):
+    """Locate the cache directory of a trajectory.
+
+    Parameters
+    ----------
+    fn : str
+        Path to the netCDF4 trajectory.
+    cacheDir : str
+        Directory holding the caches, defaults to the PYFSMSC_CACHE_DIR
+        environment variable and then to the directory of the trajectory.
+
+    Returns
+    -------
+    path : str
+        Path to the cache directory of the trajectory.
+    """
+    if cacheDir is None:
+        cacheDir = os.environ.get("PYFSMSC_CACHE_DIR")
+    if cacheDir is None:
+        return fn + ".npycache"
+    return os.path.join(cacheDir, os.path.basename(fn) + ".npycache")
+
+
+def openCache(fn, cacheDir=None):
+    """Open the cache of a trajectory when it matches its source file.
+
+    Parameters
+    ----------
+    fn : str
+        Path to the netCDF4 trajectory.
+    cacheDir : str
+        Directory holding the caches, see `cachePath`.
+
+    Returns
+    -------
+    cache : CacheDataset
+        Memory-mapped variables of the trajectory, `None` when there is no
+        cache or the source changed since the conversion.
+    """
+    path = cachePath(fn, cacheDir)
+    try:
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        stat = os.stat(fn)
+    except (OSError, ValueError):
+        return None
+    if manifest["size"] != stat.st_size or manifest["mtime"] != stat.st_mtime_ns:
+        return None  # stale
+    return CacheDataset(path, manifest)
+
+
+class CacheDataset:
+    """Memory-mapped trajectory variables read like a netCDF4 Dataset.
+
+    Parameters
+    ----------
+    path : str
+        Path to the cache directory.
+    manifest : dict
+        Manifest of the cache.
+    """
+
+    def __init__(self, path, manifest):
+        """Map the cached arrays, see the class for the parameters."""
+        self.path = path
+        self.staticTypes = manifest["staticTypes"]
+        self.variables = {
+            name: CacheVariable(os.path.join(path, name + ".npy"), dimensions)
+            for name, dimensions in manifest["variables"].items()
+        }
+        self._open = True
+
+    def __getitem__(self, name):
+        """Look up a variable by name."""
+        return self.variables[name]
+
+    def isopen(self):
+        """Check whether the cache is open."""
+        return self._open
+
+    def close(self):
+        """Release the memory maps."""
+        self.variables = {}
+        self._open = False
+
+    def typeIndex(self, type):
+        """Load the atom indices of a type stored for static atom types.
+
+        Parameters
+        ----------
+        type : int
+            Atom type.
+
+        Returns
+        -------
+        idx : ndarray
+            1D array of the atom indices of `int` type, `None` when not stored.
+        """
+        fn = os.path.join(self.path, "type%d.npy" % type)
+        if not self.staticTypes or not os.path.exists(fn):
+            return None
+        return np.load(fn)
+
+
+class CacheVariable:
+    """Memory-mapped array of one trajectory variable.
+
+    Parameters
+    ----------
+    fn : str
+        Path to the `.npy` file.
+    dimensions : list
+        Names of the netCDF4 dimensions of the variable.
+    """
+
+    def __init__(self, fn, dimensions):
+        """Map the array, see the class for the parameters."""
+        self.data = np.load(fn, mmap_mode="r")
+        self.dimensions = tuple(dimensions)
+        self.shape = self.data.shape
+        self.dtype = self.data.dtype
+
+    def __getitem__(self, index):
+        """Slice the array without copying it."""
+        return self.data[index]
@@ -1,22 +1,36 @@
 """Include utilities for calculating real space scattering from coordinates."""
 
 import numpy as np
-from netCDF4 import Dataset
+from pyfsmsc.helpfunctions.accumulators import MergeableAccumulator
+from pyfsmsc.helpfunctions.helper import numbaThreads
+from pyfsmsc.helpfunctions.parallel import parallelFrames
+from pyfsmsc.helpfunctions.trajectory import openTrajectory
+from pyfsmsc.realspace.cellList import buildCellList, cellPartialHistogram
+from pyfsmsc.realspace.pairTiles import tiledPartialHistogram
 
 
-def Coords_to_GR(fn, rCut, nHis, frame):
+def Coords_to_GR(fn, rCut, nHis, frame, method="cells", blockSize=1024, nThreads=None):
     """Convert coordinates into real space scattering data.
 
     Parameters
     ----------
-    fn : str
-        Path to the netCDF4 simulation trajectory.
+    fn : str or FrameReader
+        Path to the netCDF4 or LAMMPS dump trajectory, or an open `FrameReader`.
     rCut : float
         Cutoff value for radial distribution (r <= L/2).
     nHis : int
         Number of histogram bins for the radial distribution.
     frame : int
         Frame of the netCDF4 trajectory to compute radial distribution.
+    method : str
+        Pair search used for the histogram, "cells" for the linked-cell search,
+        "tiles" for all unique pairs in memory bounded tiles or "loop" for the
+        direct loop over all particles.
+    blockSize : int
+        Number of particles per tile for the "tiles" method.
+    nThreads : int
+        Number of threads for the "cells" method, defaults to the
+        PYFSMSC_NUM_THREADS environment variable or all available threads.
 
     Returns
     -------
@@ -25,30 +39,432 @@ def Coords_to_GR(fn, rCut, nHis, frame):
     gAll : ndarray
         1D array containing radial distribution function, G(r), of `float` type.
     """
-    ds = Dataset(fn)  # read netCDF4
-    X = ds["coordinates"][frame, :]  # grab coordinates
-    X = X[ds["atom_types"][frame, :] == 1]  # set type at 1
-    L = ds["cell_lengths"][0]  # length of cells
+    with openTrajectory(fn) as traj:  # read netCDF4
+        X = traj.positions(frame, 1)  # set type at 1
+        L = traj.cellLengths[frame]  # length of cells
 
     Npart = X.shape[0]  # number of particles
 
-    gAll = np.zeros(nHis)  # data structure to write to
-    idx = np.arange(Npart, dtype=int)
+    re, hist = pairCounts(X, L, rCut, nHis, method, blockSize, nThreads)
+    gAll = normalizeGR(re, 2 * hist, Npart, Npart / (L[0] * L[1] * L[2]))
 
-    for i in range(Npart):
+    return re, gAll
+
+
+def Coords_to_GR_frames(
+    fn,
+    rCut,
+    nHis,
+    start=0,
+    stop=None,
+    stride=1,
+    perFrame=False,
+    method="cells",
+    blockSize=1024,
+    nThreads=None,
+    nWorkers=1,
+    chunkSize=None,
+):
+    """Time average the radial distribution over a trajectory in a single pass.
+
+    With several `nWorkers` the frames are split into chunks of consecutive
+    frames counted in worker processes, see `parallelFrames`, and the pair
+    counts and particle bookkeeping of the chunks are summed in frame order.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to the netCDF4 or LAMMPS dump trajectory, or an open `FrameReader`.
+    rCut : float
+        Cutoff value for radial distribution (r <= L/2).
+    nHis : int
+        Number of histogram bins for the radial distribution.
+    start : int
+        First frame of the netCDF4 trajectory to average.
+    stop : int
+        Frame to stop before, defaults to the end of the trajectory.
+    stride : int
+        Step between averaged frames.
+    perFrame : bool
+        Also return the radial distribution of every averaged frame.
+    method : str
+        Pair search used for the histogram, see `Coords_to_GR`.
+    blockSize : int
+        Number of particles per tile for the "tiles" method.
+    nThreads : int
+        Number of threads for the "cells" method, defaults to one per worker
+        process when `nWorkers` is not 1.
+    nWorkers : int
+        Number of worker processes, `None` for every CPU.
+    chunkSize : int
+        Number of frames per chunk, defaults to an equal share of every worker.
+
+    Returns
+    -------
+    re : ndarray
+        1D array containing real space radial vectors, r, of `float` type.
+    gAll : ndarray
+        1D array containing time averaged radial distribution function, G(r), of `float` type.
+    gFrames : ndarray
+        2D array containing the radial distribution function of each frame, only
+        returned when `perFrame` is set.
+    """
+    if nWorkers != 1 and nThreads is None:
+        nThreads = 1  # the worker processes share the cores
+
+    with openTrajectory(fn) as traj:
+        frames = traj.frames(start, stop, stride)
+        if not frames:
+            raise ValueError("start, stop and stride select no frames")
+        partials = parallelFrames(
+            pairCountFrames,
+            traj,
+            frames,
+            (rCut, nHis, perFrame, method, blockSize, nThreads),
+            nWorkers,
+            chunkSize,
+        )
+
+    accumulator, gFrames = partials[0]
+    for accumulatorChunk, gChunk in partials[1:]:
+        accumulator.merge(accumulatorChunk)
+        gFrames = np.concatenate((gFrames, gChunk))
+
+    re, gAll = accumulator.finalize()
+
+    if perFrame:
+        return re, gAll, gFrames
+    return re, gAll
+
+
+def pairCountFrames(
+    fn,
+    frames,
+    rCut,
+    nHis,
+    perFrame=False,
+    method="cells",
+    blockSize=1024,
+    nThreads=None,
+):
+    """Accumulate the pair counts of frames of a trajectory.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to the netCDF4 or LAMMPS dump trajectory, or an open `FrameReader`.
+    frames : range
+        Frames of the trajectory to count.
+    rCut : float
+        Cutoff value for radial distribution (r <= L/2).
+    nHis : int
+        Number of histogram bins for the radial distribution.
+    perFrame : bool
+        Also return the radial distribution of every frame.
+    method : str
+        Pair search used for the histogram, see `Coords_to_GR`.
+    blockSize : int
+        Number of particles per tile for the "tiles" method.
+    nThreads : int
+        Number of threads for the "cells" method.
+
+    Returns
+    -------
+    accumulator : PairCountAccumulator
+        Pair counts and particle bookkeeping of the frames.
+    gFrames : ndarray
+        2D array containing the radial distribution function of each frame,
+        with no rows unless `perFrame` is set.
+    """
+    accumulator = PairCountAccumulator(rCut, nHis, method, blockSize, nThreads)
+    gFrames = np.zeros((len(frames) if perFrame else 0, nHis))
+
+    with openTrajectory(fn) as traj:  # read netCDF4 once for every frame
+        for k, (frame, X) in enumerate(traj.iterFrames(frames, 1)):  # set type at 1
+            gFrame = accumulator.update(X, traj.cellLengths[frame])
+            if perFrame:
+                gFrames[k] = gFrame
+
+    return accumulator, gFrames
+
+
+class PairCountAccumulator(MergeableAccumulator):
+    """Accumulate pair counts and particle bookkeeping over frames.
+
+    The time averaged radial distribution is normalized by the ratio of the
+    frame sums of N and N^2 / V, so accumulators of different parts of a
+    trajectory merge into exactly the average of the whole trajectory.
+
+    Parameters
+    ----------
+    rCut : float
+        Cutoff value for radial distribution (r <= L/2).
+    nHis : int
+        Number of histogram bins for the radial distribution.
+    method : str
+        Pair search used for the histogram, see `Coords_to_GR`.
+    blockSize : int
+        Number of particles per tile for the "tiles" method.
+    nThreads : int
+        Number of threads for the "cells" method.
+    """
+
+    summed = ("hist", "nFrames", "sumN", "sumN2V")
+    _method = "cells"
+    _blockSize = 1024
+    _nThreads = None
+
+    def __init__(self, rCut, nHis, method="cells", blockSize=1024, nThreads=None):
+        """Start empty sums, see the class for the parameters."""
+        self.rCut = rCut
+        self.nHis = nHis
+        self.re = np.linspace(0, rCut, nHis + 1)  # same edges as pairCounts
+        self.hist = np.zeros(nHis, dtype=np.int64)
+        self.nFrames = 0
+        self.sumN = 0  # particle bookkeeping over frames
+        self.sumN2V = 0.0
+        self._method = method
+        self._blockSize = blockSize
+        self._nThreads = nThreads
+
+    def update(self, X, L):
+        """Add the pair counts of a frame.
+
+        Parameters
+        ----------
+        X : ndarray
+            2D array of coordinates of the particles of the frame of `float` type.
+        L : ndarray
+            Array of lengths of the simulation box of `float` type.
+
+        Returns
+        -------
+        gFrame : ndarray
+            1D array containing the radial distribution function of the frame
+            of `float` type.
+        """
+        re, histFrame = pairCounts(
+            X, L, self.rCut, self.nHis, self._method, self._blockSize, self._nThreads
+        )
+        Npart = X.shape[0]
+        nid = Npart / (L[0] * L[1] * L[2])
+        self.hist += histFrame
+        self.nFrames += 1
+        self.sumN += Npart
+        self.sumN2V += Npart * nid
+        return normalizeGR(re, 2 * histFrame, Npart, nid)
+
+    def finalize(self):
+        """Normalize the pair counts of every frame.
+
+        Returns
+        -------
+        re : ndarray
+            1D array containing real space radial vectors, r, of `float` type.
+        gAll : ndarray
+            1D array containing time averaged radial distribution function, G(r), of `float` type.
+        """
+        if self.nFrames == 0:
+            raise ValueError("no frames were accumulated")
+        gAll = normalizeGR(self.re, 2 * self.hist, self.sumN, self.sumN2V / self.sumN)
+        return self.re, gAll
+
+
+def Coords_to_partialGR(
+    fn, rCut, nHis, frame, types=None, method="cells", blockSize=1024, nThreads=None
+):
+    """Convert coordinates into every partial radial distribution in one pair sweep.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to the netCDF4 or LAMMPS dump trajectory, or an open `FrameReader`.
+    rCut : float
+        Cutoff value for radial distribution (r <= L/2).
+    nHis : int
+        Number of histogram bins for the radial distribution.
+    frame : int
+        Frame of the netCDF4 trajectory to compute radial distribution.
+    types : list
+        Atom types to include, defaults to every type in the frame. Every type
+        must have atoms in the frame.
+    method : str
+        Pair search used for the histogram, "cells" or "tiles".
+    blockSize : int
+        Number of particles per tile for the "tiles" method.
+    nThreads : int
+        Number of threads for the "cells" method.
+
+    Returns
+    -------
+    re : ndarray
+        1D array containing real space radial vectors, r, of `float` type.
+    types : ndarray
+        1D array of the atom types of each partial of `int` type.
+    gab : ndarray
+        3D array containing the partial radial distribution functions, g_ab(r),
+        of atom types `types[a]` and `types[b]` in gab[a, b] of `float` type.
+    """
+    with openTrajectory(fn) as traj:  # read netCDF4
+        X = traj.coordinates(frame)  # grab coordinates
+        atomTypes = traj.atomVariable("atom_types", frame)
+        L = traj.cellLengths[frame]  # length of cells
+
+    types = np.unique(atomTypes) if types is None else np.sort(types)
+    species = np.searchsorted(types, atomTypes)  # index of each atom type
+    mask = types[np.minimum(species, types.shape[0] - 1)] == atomTypes
+    X = X[mask]
+    species = species[mask]
+
+    nSpecies = types.shape[0]
+    Npart = np.bincount(species, minlength=nSpecies)  # particles of each type
+    if np.any(Npart == 0):  # the partials would divide by zero
+        missing = types[np.flatnonzero(Npart == 0)[0]]
+        raise ValueError("frame %d has no atoms of type %d" % (frame, missing))
+    V = L[0] * L[1] * L[2]
+
+    re, hist = partialPairCounts(
+        X, species, nSpecies, L, rCut, nHis, method, blockSize, nThreads
+    )
+
+    gab = np.zeros((nSpecies, nSpecies, nHis))
+    for a in range(nSpecies):
+        gab[a, a] = normalizeGR(re, 2 * hist[a, a], Npart[a], Npart[a] / V)
+        for b in range(a + 1, nSpecies):  # unlike pairs are counted once
+            gab[a, b] = normalizeGR(re, hist[a, b], Npart[a], Npart[b] / V)
+            gab[b, a] = gab[a, b]
+
+    return re, types, gab
+
+
+def pairCounts(X, L, rCut, nHis, method="cells", blockSize=1024, nThreads=None):
+    """Histogram the distances of unique particle pairs within the cutoff.
+
+    Parameters
+    ----------
+    X : ndarray
+        2D array of coordinates of all the particles in the system of `float` type.
+    L : ndarray
+        Array of lengths of the simulation box of `float` type.
+    rCut : float
+        Cutoff value for radial distribution (r <= L/2).
+    nHis : int
+        Number of histogram bins for the radial distribution.
+    method : str
+        Pair search used for the histogram, see `Coords_to_GR`.
+    blockSize : int
+        Number of particles per tile for the "tiles" method.
+    nThreads : int
+        Number of threads for the "cells" method.
+
+    Returns
+    -------
+    re : ndarray
+        1D array containing the histogram bin edges of `float` type.
+    hist : ndarray
+        1D array of the number of unique pairs, i < j, in each bin of `int` type.
+    """
+    if method != "loop":
+        species = np.zeros(X.shape[0], dtype=np.int64)  # a single species
+        re, hist = partialPairCounts(
+            X, species, 1, L, rCut, nHis, method, blockSize, nThreads
+        )
+        return re, hist[0, 0]
+
+    X = np.ascontiguousarray(X, dtype=float)
+    L = np.asarray(L, dtype=float)
+    hist = np.zeros(nHis, dtype=np.int64)
+    idx = np.arange(X.shape[0], dtype=int)
+
+    for i in range(X.shape[0]):
         dXij = neigh_distances(i, X, idx)
         Rij = np.linalg.norm(adjust_half_box(dXij, L), axis=1)
         gi, re = np.histogram(
             Rij[Rij < rCut], bins=nHis, range=(0, rCut), density=False
         )
-        gAll += gi
-    gAll = gAll / Npart
+        hist += gi
+    hist //= 2  # every pair was visited from both particles
+
+    return re, hist
+
 
+def partialPairCounts(
+    X, species, nSpecies, L, rCut, nHis, method="cells", blockSize=1024, nThreads=None
+):
+    """Histogram unique pair distances by the species of both particles in one sweep.
+
+    Parameters
+    ----------
+    X : ndarray
+        2D array of coordinates of all the particles in the system of `float` type.
+    species : ndarray
+        1D array of species indices, from 0 to `nSpecies` - 1, of `int` type.
+    nSpecies : int
+        Number of species.
+    L : ndarray
+        Array of lengths of the simulation box of `float` type.
+    rCut : float
+        Cutoff value for radial distribution (r <= L/2).
+    nHis : int
+        Number of histogram bins for the radial distribution.
+    method : str
+        Pair search used for the histogram, "cells" or "tiles".
+    blockSize : int
+        Number of particles per tile for the "tiles" method.
+    nThreads : int
+        Number of threads for the "cells" method.
+
+    Returns
+    -------
+    re : ndarray
+        1D array containing the histogram bin edges of `float` type.
+    hist : ndarray
+        3D array of the number of unique pairs in each bin of `int` type, the
+        pairs of species a <= b are stored in hist[a, b].
+    """
+    X = np.ascontiguousarray(X, dtype=float)  # plain arrays for @jit
+    L = np.asarray(L, dtype=float)
+    species = np.asarray(species, dtype=np.int64)
+    re = np.linspace(0, rCut, nHis + 1)  # same edges as np.histogram
+
+    if method == "cells":
+        Xs, order, cellStart, ncell = buildCellList(X, L, rCut)
+        with numbaThreads(nThreads) as nThreads:
+            hist = cellPartialHistogram(
+                Xs, species[order], nSpecies, L, re, cellStart, ncell, nThreads
+            )
+    elif method == "tiles":
+        hist = tiledPartialHistogram(X, species, nSpecies, L, re, blockSize)
+    else:
+        raise ValueError("method must be 'cells' or 'tiles'")
+
+    return re, hist
+
+
+def normalizeGR(re, hist, Npart, nid):
+    """Normalize neighbor counts by the ideal gas shell populations.
+
+    Parameters
+    ----------
+    re : ndarray
+        1D array containing the histogram bin edges of `float` type.
+    hist : ndarray
+        1D array of neighbor counts summed over all reference particles.
+    Npart : int
+        Number of reference particles.
+    nid : float
+        Number density of the neighbors.
+
+    Returns
+    -------
+    gAll : ndarray
+        1D array containing radial distribution function, G(r), of `float` type.
+    """
+    gAll = hist / Npart
     Vb = 4 / 3 * np.pi * (re[1:] ** 3 - re[:-1] ** 3)  # shell volume
-    nid = Npart / (L[0] * L[1] * L[2])  # neighbors
     gAll = gAll / (Vb * nid)  # normalize radial distribution
 
-    return re, gAll
+    return gAll
 
 
 def neigh_distances(i, X, idx):
@@ -4,3 +4,13 @@ from pyfsmsc.realspace.rdf2sq import RDF_to_SQ
 from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR
 from pyfsmsc.realspace.Coords_to_GR import neigh_distances
 from pyfsmsc.realspace.Coords_to_GR import adjust_half_box
+from pyfsmsc.realspace.cellList import buildCellList
+from pyfsmsc.realspace.pairTiles import tiledHistogram
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR_frames
+from pyfsmsc.realspace.Coords_to_GR import pairCounts
+from pyfsmsc.realspace.Coords_to_GR import normalizeGR
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_partialGR
+from pyfsmsc.realspace.Coords_to_GR import partialPairCounts
+from pyfsmsc.realspace.cellList import cellPartialHistogram
+from pyfsmsc.realspace.pairTiles import tiledPartialHistogram
+from pyfsmsc.realspace.Coords_to_GR import PairCountAccumulator
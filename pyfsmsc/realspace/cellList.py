@@ -0,0 +1,174 @@
+"""Include utilities for linked-cell neighbor searches in periodic boxes."""
+
+import numpy as np
+from numba import jit, prange
+
+
+def buildCellList(X, L, rCut):
+    """Bin particles into periodic cells with sides of at least the cutoff.
+
+    Cells are also no smaller than the mean volume per particle, so dilute
+    systems or small cutoffs never have many more cells than particles.
+
+    Parameters
+    ----------
+    X : ndarray
+        2D array of coordinates of all the particles in the system of `float` type.
+    L : ndarray
+        Array of lengths of the simulation box of `float` type.
+    rCut : float
+        Cutoff value for the neighbor search.
+
+    Returns
+    -------
+    Xs : ndarray
+        2D array of particle coordinates sorted by cell of `float` type.
+    order : ndarray
+        1D array mapping sorted particles back to their original index of `int` type.
+    cellStart : ndarray
+        1D array of offsets of each cell into the sorted coordinates of `int` type.
+    ncell : ndarray
+        1D array with the number of cells along each box direction of `int` type.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    L = np.asarray(L, dtype=np.float64)
+
+    side = max(rCut, (np.prod(L) / max(X.shape[0], 1)) ** (1 / 3))  # at most ~N cells
+    ncell = np.maximum(np.floor(L / side), 1).astype(np.int64)  # cell side >= rCut
+
+    s = X / L
+    s -= np.floor(s)  # fractional coordinates wrapped into the box
+    c = np.minimum((s * ncell).astype(np.int64), ncell - 1)
+    cellID = (c[:, 0] * ncell[1] + c[:, 1]) * ncell[2] + c[:, 2]
+
+    order = np.argsort(cellID, kind="stable")  # group particles by cell
+    counts = np.bincount(cellID, minlength=np.prod(ncell))
+    cellStart = np.zeros(counts.shape[0] + 1, dtype=np.int64)
+    cellStart[1:] = np.cumsum(counts)
+
+    return np.ascontiguousarray(X[order]), order, cellStart, ncell
+
+
+@jit(nopython=True, parallel=True)
+def cellPartialHistogram(X, species, nSpecies, L, edges, cellStart, ncell, nThreads=1):
+    """Histogram pair distances in adjacent cells by the species of both particles.
+
+    Parameters
+    ----------
+    X : ndarray
+        2D array of particle coordinates sorted by cell of `float` type.
+    species : ndarray
+        1D array of species indices, from 0 to `nSpecies` - 1, sorted by cell of `int` type.
+    nSpecies : int
+        Number of species.
+    L : ndarray
+        Array of lengths of the simulation box of `float` type.
+    edges : ndarray
+        1D array of uniformly spaced histogram bin edges of `float` type.
+    cellStart : ndarray
+        1D array of offsets of each cell into the sorted coordinates of `int` type.
+    ncell : ndarray
+        1D array with the number of cells along each box direction of `int` type.
+    nThreads : int
+        Number of private histograms, cells are dealt to them round robin.
+
+    Returns
+    -------
+    hist : ndarray
+        3D array of the number of unique pairs in each bin of `int` type, the
+        pairs of species a <= b are stored in hist[a, b].
+    """
+    nHis = edges.shape[0] - 1
+    rCut = edges[-1]
+    hist = np.zeros(
+        (nThreads, nSpecies, nSpecies, nHis), dtype=np.int64
+    )  # one histogram per thread
+
+    nx, ny, nz = ncell[0], ncell[1], ncell[2]
+    kx = 3 if nx >= 3 else nx  # avoid visiting the same cell twice in small boxes
+    ky = 3 if ny >= 3 else ny
+    kz = 3 if nz >= 3 else nz
+
+    for t in prange(nThreads):
+        for c in range(t, nx * ny * nz, nThreads):
+            cx = c // (ny * nz)
+            cy = (c // nz) % ny
+            cz = c % nz
+            for a in range(kx):
+                bx = (cx + a - 1) % nx if nx >= 3 else a
+                for b in range(ky):
+                    by = (cy + b - 1) % ny if ny >= 3 else b
+                    for e in range(kz):
+                        bz = (cz + e - 1) % nz if nz >= 3 else e
+                        nb = (bx * ny + by) * nz + bz
+                        for i in range(cellStart[c], cellStart[c + 1]):
+                            si = species[i]
+                            for j in range(cellStart[nb], cellStart[nb + 1]):
+                                if j <= i:  # count each pair once
+                                    continue
+                                r = pairDistance(X, L, i, j)
+                                if r < rCut:
+                                    sj = species[j]
+                                    hist[
+                                        t, min(si, sj), max(si, sj), binIndex(r, edges)
+                                    ] += 1
+
+    return hist.sum(axis=0)  # reduce the private histograms
+
+
+@jit(nopython=True)
+def pairDistance(X, L, i, j):
+    """Compute the minimum image distance between two particles.
+
+    Parameters
+    ----------
+    X : ndarray
+        2D array of coordinates of all the particles in the system of `float` type.
+    L : ndarray
+        Array of lengths of the simulation box of `float` type.
+    i : int
+        Index of the reference particle.
+    j : int
+        Index of the neighbor particle.
+
+    Returns
+    -------
+    r : float
+        Distance between the particles, matching `adjust_half_box`.
+    """
+    r2 = 0.0
+    for d in range(3):
+        dx = X[j, d] - X[i, d]
+        if dx > 0.5 * L[d]:
+            dx -= L[d]
+        elif dx <= -0.5 * L[d]:
+            dx += L[d]
+        r2 += dx * dx
+    return np.sqrt(r2)
+
+
+@jit(nopython=True)
+def binIndex(r, edges):
+    """Locate the histogram bin of a distance the same way as `np.histogram`.
+
+    Parameters
+    ----------
+    r : float
+        Distance inside the histogram range.
+    edges : ndarray
+        1D array of uniformly spaced histogram bin edges of `float` type.
+
+    Returns
+    -------
+    idx : int
+        Index of the bin holding the distance.
+    """
+    nHis = edges.shape[0] - 1
+    idx = int((r - edges[0]) / (edges[-1] - edges[0]) * nHis)
+    if idx == nHis:
+        idx -= 1
+    if r < edges[idx]:  # correct for rounding at the bin edges
+        idx -= 1
+    elif r >= edges[idx + 1] and idx != nHis - 1:
+        idx += 1
+    return idx
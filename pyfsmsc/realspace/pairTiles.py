@@ -0,0 +1,87 @@
+"""Include utilities for histogramming pair distances in memory bounded tiles."""
+
+import numpy as np
+
+
+def tiledHistogram(X, L, edges, blockSize=1024):
+    """Histogram minimum image distances of unique pairs, i < j, tile by tile.
+
+    Parameters
+    ----------
+    X : ndarray
+        2D array of coordinates of all the particles in the system of `float` type.
+    L : ndarray
+        Array of lengths of the simulation box of `float` type, `None` for
+        particles without periodic images.
+    edges : ndarray
+        1D array of increasing histogram bin edges of `float` type.
+    blockSize : int
+        Number of particles per tile, peak memory scales with `blockSize` ** 2.
+
+    Returns
+    -------
+    hist : ndarray
+        1D array of the number of unique pairs in each bin of `int` type.
+    """
+    species = np.zeros(X.shape[0], dtype=np.int64)  # a single species
+    return tiledPartialHistogram(X, species, 1, L, edges, blockSize)[0, 0]
+
+
+def tiledPartialHistogram(X, species, nSpecies, L, edges, blockSize=1024):
+    """Histogram unique pair distances tile by tile by the species of both particles.
+
+    Parameters
+    ----------
+    X : ndarray
+        2D array of coordinates of all the particles in the system of `float` type.
+    species : ndarray
+        1D array of species indices, from 0 to `nSpecies` - 1, of `int` type.
+    nSpecies : int
+        Number of species.
+    L : ndarray
+        Array of lengths of the simulation box of `float` type, `None` for
+        particles without periodic images.
+    edges : ndarray
+        1D array of increasing histogram bin edges of `float` type.
+    blockSize : int
+        Number of particles per tile, peak memory scales with `blockSize` ** 2.
+
+    Returns
+    -------
+    hist : ndarray
+        3D array of the number of unique pairs in each bin of `int` type, the
+        pairs of species a <= b are stored in hist[a, b].
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    species = np.asarray(species, dtype=np.int64)
+    nHis = edges.shape[0] - 1
+    rCut = edges[-1]
+    Npart = X.shape[0]
+
+    hist = np.zeros(nSpecies * nSpecies * nHis, dtype=np.int64)
+    for i0 in range(0, Npart, blockSize):
+        Xi = X[i0:][:blockSize]
+        si = species[i0:][:blockSize]
+        for j0 in range(i0, Npart, blockSize):
+            Xj = X[j0:][:blockSize]
+            sj = species[j0:][:blockSize]
+            dXij = Xj[None, :, :] - Xi[:, None, :]  # tile of pair differences
+            if L is not None:  # adjust for periodic cells like adjust_half_box
+                for d in range(3):
+                    dXij[..., d] -= L[d] * (dXij[..., d] > 0.5 * L[d])
+                    dXij[..., d] += L[d] * (dXij[..., d] <= -0.5 * L[d])
+            dXij *= dXij
+            Rij = np.sqrt(dXij[..., 0] + dXij[..., 1] + dXij[..., 2])
+            pair = (
+                np.minimum(si[:, None], sj[None, :]) * nSpecies
+                + np.maximum(si[:, None], sj[None, :])
+            ) * nHis  # offset of the species pair histogram
+            if i0 == j0:  # keep only i < j on diagonal tiles
+                upper = np.triu_indices(Rij.shape[0], k=1)
+                Rij = Rij[upper]
+                pair = pair[upper]
+            inside = Rij < rCut
+            idx = np.searchsorted(edges, Rij[inside], side="right") - 1
+            hist += np.bincount(pair[inside] + idx, minlength=hist.shape[0])
+
+    return hist.reshape(nSpecies, nSpecies, nHis)
@@ -2,9 +2,10 @@
 
 import numpy as np
 import pandas as pd
+from pyfsmsc.helpfunctions.sineTransform import SineTransform
 
 
-def RDF_to_SQ(r, gr, density, qmin, qmax, nqs):
+def RDF_to_SQ(r, gr, density, qmin, qmax, nqs, plan=None, method="auto", window=None):
     """Convert real space scattering data into reciprocal space scattering data.
 
     Parameters
@@ -12,7 +13,8 @@ def RDF_to_SQ(r, gr, density, qmin, qmax, nqs):
     r : ndarray
         1D array containing real space vector magnitudes, r, of `float` type.
     gr : ndarray
-        1D array containing radial distribution, G(r), of `float` type.
+        1D array containing radial distribution, G(r), of `float` type, or 2D
+        array of a radial distribution in each row.
     density : float
         Number density of the species with scattering data.
     qmin : float
@@ -21,23 +23,26 @@ def RDF_to_SQ(r, gr, density, qmin, qmax, nqs):
         Maximum x-value for the reciprocal space conversion.
     nqs : int
         Number of points to map real space to reciprocal space.
+    plan : SineTransform
+        Precomputed transform from `r` to the q grid, reused across calls
+        instead of `qmin`, `qmax` and `nqs` when given.
+    method : str
+        "dense", "dst", "filon" or "auto" evaluation of a new plan, see
+        `SineTransform`.
+    window : str
+        "lorch" to damp truncation ripples of a new plan, see `SineTransform`.
 
     Returns
     -------
     qs : ndarray
         1D array containing reciprocal space vector magnitudes, q, of `float` type.
     Sqs : ndarray
-        1D array containing reciprocal distribution values, S(q), of `float` type.
+        1D array containing reciprocal distribution values, S(q), of `float` type,
+        or 2D array with a row for each row of `gr`.
     """
-    rs = r
-    dr = r[1] - r[0]  # calculate dr for integral
-    RDFs = gr - 1  # adjust rdf
-    qs = np.linspace(qmin, qmax, num=nqs)
-    Sqs = np.zeros(qs.shape[0])
-    for qind, q in enumerate(qs):  # integrate
-        s = 0
-        for rind, r in enumerate(rs):
-            s += dr * r * np.sin(q * r) * RDFs[rind]
-            Sqs[qind] = 1 + 4 * np.pi * density * s / q
+    if plan is None:
+        plan = SineTransform(r, np.linspace(qmin, qmax, num=nqs), method, window)
+    RDFs = np.asarray(gr, dtype=float) - 1  # adjust rdf
+    Sqs = 1 + 4 * np.pi * density * plan.apply(RDFs)  # integrate
 
-    return qs, Sqs
+    return plan.k, Sqs
@@ -1,70 +1,298 @@
 """Include utilities for calculating reciprocal space scattering from coordinates."""
 
 import numpy as np
-from numba import jit
-import pandas as pd
+import scipy.fft
 import warnings
-from netCDF4 import Dataset
-import numpy.ma as ma
+from pyfsmsc.helpfunctions.helper import numbaThreads
+from pyfsmsc.helpfunctions.trajectory import openTrajectory
+from pyfsmsc.reciprocalspace.Coords_to_SQ import densityModes, generateHalfSpace
 
 warnings.filterwarnings("ignore")
 
-def Coords_to_FSQ(fn, type, n):
-    """Convert atomic coordinates into intemediate scattering data.
+
+def Coords_to_FSQ(
+    fn,
+    type,
+    n,
+    start=0,
+    stop=None,
+    stride=1,
+    maxLag=None,
+    maxDirections=None,
+    seed=0,
+    chunkSize=256,
+    maxBytes=2**28,
+):
+    """Convert atomic coordinates into self intermediate scattering data.
+
+    Fs(q, t) is averaged over every time origin by correlating the phase
+    series exp(i q . r_j(t)) of each particle with FFTs, in O(T log T) per
+    particle and direction. The q-vectors lie on the reciprocal lattice of
+    the box, so wrapped coordinates give the same phases as unwrapped ones,
+    and the box must not change along the trajectory. Particles are matched
+    across frames by their identifier when the file stores one. The
+    positions of every frame are held for one block of particles at a time,
+    with one pass over the trajectory per block, so the memory stays within
+    `maxBytes` for any number of frames and particles.
+
+    Unlike earlier versions, which took `n` as the index of the single
+    vector 2 pi n / L (1, 1, 1) and returned `x, Fs`, `n` is the magnitude of
+    the lattice directions averaged over and `qmag` is returned as well.
 
     Parameters
     ----------
-    fn : str
-        Path to netCDF4 file.
+    fn : str or FrameReader
+        Path to netCDF4 file or LAMMPS dump, or an open `FrameReader`.
     type : int
         Atom type for scattering.
-    nmax : int
-        Maximum integer index for reciprocal vectors.
+    n : int
+        Integer magnitude, or list of magnitudes, of the reciprocal vector
+        indices; each is averaged over the lattice directions with rint(abs(n)) = n.
+    start : int
+        First frame of the netCDF4 trajectory.
+    stop : int
+        Frame to stop before, defaults to the end of the trajectory.
+    stride : int
+        Step between frames used as time origins and lags.
+    maxLag : int
+        Largest lag in frames of the returned correlation, defaults to every lag.
+    maxDirections : int
+        Largest number of directions per magnitude, more are randomly subsampled.
+    seed : int
+        Seed of the direction subsampling.
+    chunkSize : int
+        Largest number of particles correlated at once.
+    maxBytes : int
+        Memory budget in bytes of the positions and phase series held at once.
+        Half of it holds the positions of a block of particles, 24 T bytes
+        per particle, the other half the phase series correlated at once,
+        about 64 next_fast_len(2 T) bytes per series of T frames; chunks are
+        split over particles and directions to stay within it.
 
     Returns
     -------
-    qmagVec : ndarray
-        1D array containing magnitude of reciprocal space vector, q, of `float` type.
-    ds3 : ndarray
-        1D array containing non-averaged scattering data, F(q), of simulation in `float` type.
+    x : ndarray
+        1D array containing the lag time of each correlation point of `float` type.
+    qmag : ndarray
+        1D array containing the magnitude of the reciprocal space vectors, q, of `float` type.
+    Fs : ndarray
+        2D array containing self intermediate scattering data, Fs(q, t), of each
+        magnitude in rows of `float` type.
     """
+    directions = shellDirections(n, maxDirections, seed)
 
-    ds = Dataset(fn)
-    # initial frame
-    frame = 0
+    with openTrajectory(fn) as traj:  # read data
+        frames = traj.frames(start, stop, stride)
+        T = len(frames)
+        nLags = T if maxLag is None else min(maxLag + 1, T)
 
-    X0 = ds["coordinates"][frame, :]  # grab coordinates
+        L = traj.cellLengths[frames[0]]  # cell coordinates
+        if not np.allclose(traj.cellLengths[list(frames)], L):
+            raise ValueError("the box must be the same in every frame")
+        x = traj.time[list(frames[:nLags])] - traj.time[frames[0]]
 
-    type = 2
-    X0 = X0[ds["atom_types"][frame, :] == type]  # get atom type
+        waves = [2 * np.pi * item / L for item in directions]
+        nfft = scipy.fft.next_fast_len(2 * T)  # see fftCorrelation
+        nSeries = max(maxBytes // 2 // (64 * nfft), 1)  # phases, spectra, correlations
+        nBlock = max(maxBytes // 2 // (24 * T), 1)  # positions of every frame
 
-    t = ds['time']
-    L = ds["cell_lengths"][0]  # cell coordinates
+        Fs = np.zeros((len(waves), nLags))
+        i0 = 0
+        N = None
+        while N is None or i0 < N:  # one pass over the trajectory per block
+            X = None
+            for t, (frame, Xt) in enumerate(traj.iterFrames(frames, type, True)):
+                if X is None:
+                    N = Xt.shape[0]
+                    X = np.zeros((T,) + Xt[i0:][:nBlock].shape)  # block positions
+                X[t] = Xt[i0:][:nBlock]
+            Fs += selfCorrelation(X, waves, nLags, nSeries, chunkSize)
+            i0 += nBlock
 
-    q = 2*np.pi/L*np.array([n,n,n])
+    qmag = np.array([np.linalg.norm(q, axis=1).mean() for q in waves])
+    origins = T - np.arange(nLags)  # number of time origins of each lag
+    Fs /= N * origins * np.array([q.shape[0] for q in waves])[:, None]
 
-    timesteps = len(t) - 1
+    return x, qmag, Fs
 
-    x = np.linspace(0.01, int(timesteps/100), timesteps)
 
-    len(t)
-    fme = len(t)
+def selfCorrelation(X, waves, nLags, nSeries, chunkSize):
+    """Sum the phase correlations of particles over time origins and directions.
+
+    Parameters
+    ----------
+    X : ndarray
+        3D array containing the positions of the particles in every frame of
+        `float` type.
+    waves : list
+        2D arrays of the q-vectors of each magnitude of `float` type.
+    nLags : int
+        Number of lags, starting at zero, to return.
+    nSeries : int
+        Largest number of phase series correlated at once.
+    chunkSize : int
+        Largest number of particles correlated at once.
+
+    Returns
+    -------
+    corr : ndarray
+        2D array of the sums over particles, directions and time origins of
+        each magnitude in rows of `float` type.
+    """
+    corr = np.zeros((len(waves), nLags))
+    for k, q in enumerate(waves):
+        for j0 in range(0, q.shape[0], nSeries):
+            qc = q[j0:][:nSeries]
+            nParticles = max(min(chunkSize, nSeries // qc.shape[0]), 1)
+            for i0 in range(0, X.shape[1], nParticles):
+                Xc = X[:, i0:][:, :nParticles]
+                phase = np.exp(1j * (Xc @ qc.T))  # (T, particles, directions)
+                corr[k] += fftCorrelation(phase, nLags).real.sum(axis=(1, 2))
+    return corr
+
 
-    fR = np.array([])
-    fI = np.array([])
+def Coords_to_FQT(
+    fn,
+    type,
+    n,
+    start=0,
+    stop=None,
+    stride=1,
+    maxLag=None,
+    maxDirections=None,
+    seed=0,
+    nThreads=None,
+):
+    """Convert atomic coordinates into collective intermediate scattering data.
+
+    Every frame is read once and reduced to the collective densities rho_q(t)
+    of the chosen scattering vectors, so the memory grows with the number of
+    frames and q-vectors but not with the number of particles. F(q, t) =
+    <rho_q(t) rho_-q(0)> / N is averaged over every time origin with FFTs.
+    The q-vectors lie on the reciprocal lattice of the box, which must not
+    change along the trajectory.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to netCDF4 file or LAMMPS dump, or an open `FrameReader`.
+    type : int
+        Atom type for scattering.
+    n : int
+        Integer magnitude, or list of magnitudes, of the reciprocal vector
+        indices; each is averaged over the lattice directions with rint(abs(n)) = n.
+    start : int
+        First frame of the netCDF4 trajectory.
+    stop : int
+        Frame to stop before, defaults to the end of the trajectory.
+    stride : int
+        Step between frames used as time origins and lags.
+    maxLag : int
+        Largest lag in frames of the returned correlation, defaults to every lag.
+    maxDirections : int
+        Largest number of directions per magnitude, more are randomly subsampled.
+    seed : int
+        Seed of the direction subsampling.
+    nThreads : int
+        Number of threads for the wave sums.
+
+    Returns
+    -------
+    x : ndarray
+        1D array containing the lag time of each correlation point of `float` type.
+    qmag : ndarray
+        1D array containing the magnitude of the reciprocal space vectors, q, of `float` type.
+    Fqt : ndarray
+        2D array containing collective intermediate scattering data, F(q, t), of
+        each magnitude in rows of `float` type.
+    """
+    directions = shellDirections(n, maxDirections, seed)
+    waves = np.concatenate(directions)
+    shell = np.repeat(np.arange(len(directions)), [d.shape[0] for d in directions])
 
-    for t in range(0,timesteps):
+    with openTrajectory(fn) as traj, numbaThreads(nThreads) as nThreads:
+        frames = traj.frames(start, stop, stride)  # read data once
+        T = len(frames)
+        nLags = T if maxLag is None else min(maxLag + 1, T)
 
-        Xf = ds["coordinates"][t, :]  # grab coordinates
-        Xf = Xf[ds["atom_types"][t, :] == type]  # get atom type
-        rjr0 = Xf - X0
+        L = traj.cellLengths[frames[0]]  # cell coordinates
+        if not np.allclose(traj.cellLengths[list(frames)], L):
+            raise ValueError("the box must be the same in every frame")
+        x = traj.time[list(frames[:nLags])] - traj.time[frames[0]]
 
-        fR = np.append(fR, np.cos(np.sum(-q*(rjr0),axis=1)).mean())
-        fI = np.append(fI, np.sin(np.sum(-q*(rjr0),axis=1)).mean())
+        rho = np.zeros((T, waves.shape[0]), dtype=np.complex128)  # rho_q(t) series
+        for k, (frame, X) in enumerate(traj.iterFrames(frames, type)):  # for @jit
+            rho[k] = densityModes(waves, L, X, nThreads)
 
-    Fs = (fR**2 + fI**2)**0.5
+    corr = fftCorrelation(rho, nLags).real  # (lags, q-vectors)
+    Fqt = np.zeros((len(directions), nLags))
+    for k in range(len(directions)):
+        Fqt[k] = corr[:, shell == k].mean(axis=1)
+    Fqt /= X.shape[0] * (T - np.arange(nLags))  # particles and time origins
 
-    x=np.linspace(500000*0.01*1/10**(6), 500000*0.01*fme/10**(6), fme-1)
+    qmag = np.array(
+        [np.linalg.norm(2 * np.pi * d / L, axis=1).mean() for d in directions]
+    )
 
-    return x, Fs
+    return x, qmag, Fqt
 
+
+def shellDirections(n, maxDirections=None, seed=0):
+    """Collect the half-space lattice directions of integer index magnitudes.
+
+    Magnitudes without lattice directions, such as zero, raise a ValueError,
+    as their averages would be empty.
+
+    Parameters
+    ----------
+    n : int
+        Integer magnitude, or list of magnitudes, of the reciprocal vector indices.
+    maxDirections : int
+        Largest number of directions per magnitude, more are randomly subsampled.
+    seed : int
+        Seed of the direction subsampling.
+
+    Returns
+    -------
+    directions : list
+        2D arrays of the integer indices with rint(abs(n)) equal to each magnitude.
+    """
+    n = np.atleast_1d(n)
+    if maxDirections is not None and maxDirections < 1:
+        raise ValueError("maxDirections must be at least 1")
+    lattice = generateHalfSpace(int(np.max(n)) + 1)
+    shell = np.rint(np.linalg.norm(lattice, axis=1)).astype(int)
+    rng = np.random.default_rng(seed)
+
+    directions = []
+    for item in n:
+        inShell = lattice[shell == item]
+        if inShell.shape[0] == 0:
+            raise ValueError("no lattice directions have magnitude %s" % item)
+        if maxDirections is not None and inShell.shape[0] > maxDirections:
+            inShell = inShell[
+                np.sort(rng.permutation(inShell.shape[0])[:maxDirections])
+            ]
+        directions.append(inShell)
+
+    return directions
+
+
+def fftCorrelation(a, nLags):
+    """Sum a(t + lag) a*(t) over every time origin with zero padded FFTs.
+
+    Parameters
+    ----------
+    a : ndarray
+        Array of time series along the first axis of `complex` type.
+    nLags : int
+        Number of lags, starting at zero, to return.
+
+    Returns
+    -------
+    corr : ndarray
+        Array of the origin sums of each lag along the first axis of `complex` type.
+    """
+    nfft = scipy.fft.next_fast_len(2 * a.shape[0])  # padding avoids circular wrap
+    F = scipy.fft.fft(a, n=nfft, axis=0)
+    return scipy.fft.ifft(F.real**2 + F.imag**2, axis=0)[:nLags]
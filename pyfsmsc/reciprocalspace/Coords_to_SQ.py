@@ -1,28 +1,41 @@
 """Include utilities for calculating reciprocal space scattering from coordinates."""
 
 import numpy as np
-from numba import jit
+from numba import jit, prange
 import pandas as pd
 import warnings
-from netCDF4 import Dataset
 import numpy.ma as ma
+from pyfsmsc.helpfunctions.accumulators import MergeableAccumulator
+from pyfsmsc.helpfunctions.helper import numbaThreads
+from pyfsmsc.helpfunctions.parallel import parallelFrames
+from pyfsmsc.helpfunctions.trajectory import openTrajectory
 
 warnings.filterwarnings("ignore")
 
 
-def Coords_to_SQ(fn, type, nmax, frame):
+def Coords_to_SQ(
+    fn, type, nmax, frame, method="recurrence", nThreads=None, waves="octant"
+):
     """Convert atomic coordinates into scattering data.
 
     Parameters
     ----------
-    fn : str
-        Path to netCDF4 file.
+    fn : str or FrameReader
+        Path to netCDF4 file or LAMMPS dump, or an open `FrameReader`.
     type : int
         Atom type for scattering.
     nmax : int
         Maximum integer index for reciprocal vectors.
     frame : int
         Frame of the netCDF4 trajectory to compute structure factor.
+    method : str
+        Kernel for the wave sums, "recurrence" builds the plane waves from
+        per-axis phase tables and "direct" evaluates every cosine and sine.
+    nThreads : int
+        Number of threads for the "recurrence" kernel.
+    waves : str
+        Scattering vectors, "octant" for the cube of non-negative indices below
+        `nmax` or "halfspace" for one of each +/- q pair with 0 < abs(n) <= `nmax`.
 
     Returns
     -------
@@ -31,25 +44,319 @@ def Coords_to_SQ(fn, type, nmax, frame):
     ds3 : ndarray
         1D array containing non-averaged scattering data, S(q), of simulation in `float` type.
     """
-    ds = Dataset(fn)  # read data
-    X = ds["coordinates"][frame, :]  # grab coordinates
-    X = X[ds["atom_types"][frame, :] == type]  # get atom type
-    L = ds["cell_lengths"][0]  # cell coordinates
+    with openTrajectory(fn) as traj:  # read data
+        df = traj.positions(frame, type)  # plain array of the atom type for @jit
+        L = traj.cellLengths[0]  # cell coordinates
 
-    df = pd.DataFrame(X).to_numpy()  # convert masked array into normal array for @jit
+    if waves == "octant":
+        n = generateIndices(nmax)
+    elif waves == "halfspace":
+        n = generateHalfSpace(nmax)
+    else:
+        raise ValueError("waves must be 'octant' or 'halfspace'")
+    ds1 = 2 * np.pi * n / L  # q-vectors for scattering
 
-    ds1 = generateWaves(nmax, L)
-    ds3 = waveInteractions(ds1, df)
+    if method == "recurrence":
+        with numbaThreads(nThreads) as nThreads:
+            ds3 = recurrenceInteractions(n, L, df, nThreads)
+    elif method == "direct":
+        ds3 = waveInteractions(ds1, df)
+    else:
+        raise ValueError("method must be 'recurrence' or 'direct'")
     ds3 = ds3 / df.shape[0]
-    qmagVec = np.zeros((nmax**3, 1))
-    for rows in range(0, nmax**3):  # magnitude of reciprocal space vector
-        qmagVec[rows] = (ds1[rows][0] ** 2 + ds1[rows][1] ** 2 + ds1[rows][2] ** 2) ** (
-            0.5
-        )
+    qmagVec = (ds1[:, 0] ** 2 + ds1[:, 1] ** 2 + ds1[:, 2] ** 2) ** 0.5
+    qmagVec = qmagVec.reshape(-1, 1)  # magnitude of reciprocal space vector
 
     return qmagVec, ds3
 
 
+def Coords_to_SQ_frames(
+    fn,
+    type,
+    nmax,
+    start=0,
+    stop=None,
+    stride=1,
+    method="recurrence",
+    nThreads=None,
+    waves="octant",
+    nWorkers=1,
+    chunkSize=None,
+):
+    """Time average scattering data over a trajectory in a single pass.
+
+    The scattering vectors are generated once and kept on the integer lattice
+    of the first frame, every frame only pays for the wave sums. The mean and
+    variance over frames are updated in place with Welford's algorithm. With
+    several `nWorkers` the frames are split into chunks of consecutive frames
+    summed in worker processes, see `parallelFrames`, and the means and
+    variances of the chunks are merged in frame order.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to netCDF4 file or LAMMPS dump, or an open `FrameReader`.
+    type : int
+        Atom type for scattering.
+    nmax : int
+        Maximum integer index for reciprocal vectors.
+    start : int
+        First frame of the netCDF4 trajectory to average.
+    stop : int
+        Frame to stop before, defaults to the end of the trajectory.
+    stride : int
+        Step between averaged frames.
+    method : str
+        Kernel for the wave sums, "recurrence" or "direct".
+    nThreads : int
+        Number of threads for the "recurrence" kernel, defaults to one per
+        worker process when `nWorkers` is not 1.
+    waves : str
+        Scattering vectors, "octant" or "halfspace".
+    nWorkers : int
+        Number of worker processes, `None` for every CPU.
+    chunkSize : int
+        Number of frames per chunk, defaults to an equal share of every worker.
+
+    Returns
+    -------
+    qmagVec : ndarray
+        2D array containing magnitude of reciprocal space vector, q, of `float` type.
+    ds3 : ndarray
+        2D array containing time averaged non-averaged scattering data, S(q), of `float` type.
+    ds3Var : ndarray
+        2D array containing the variance of S(q) between frames of `float` type.
+    """
+    if waves == "octant":
+        n = generateIndices(nmax)
+    elif waves == "halfspace":
+        n = generateHalfSpace(nmax)
+    else:
+        raise ValueError("waves must be 'octant' or 'halfspace'")
+    if method not in ("recurrence", "direct"):
+        raise ValueError("method must be 'recurrence' or 'direct'")
+
+    if nWorkers != 1 and nThreads is None:
+        nThreads = 1  # the worker processes share the cores
+
+    with openTrajectory(fn) as traj:
+        frames = traj.frames(start, stop, stride)
+        if not frames:
+            raise ValueError("start, stop and stride select no frames")
+        partials = parallelFrames(
+            scatteringFrames,
+            traj,
+            frames,
+            (type, n, method, nThreads),
+            nWorkers,
+            chunkSize,
+        )
+
+    accumulator = partials[0]
+    for accumulatorChunk in partials[1:]:
+        accumulator.merge(accumulatorChunk)
+    qmagVec, ds3, ds3Var = accumulator.finalize()
+
+    return qmagVec, ds3, ds3Var
+
+
+def scatteringFrames(fn, frames, type, n, method="recurrence", nThreads=None):
+    """Accumulate the scattering data of frames of a trajectory.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to netCDF4 file or LAMMPS dump, or an open `FrameReader`.
+    frames : range
+        Frames of the trajectory to sum.
+    type : int
+        Atom type for scattering.
+    n : ndarray
+        2D array containing the integer index of each scattering vector of `int` type.
+    method : str
+        Kernel for the wave sums, "recurrence" or "direct".
+    nThreads : int
+        Number of threads for the "recurrence" kernel.
+
+    Returns
+    -------
+    accumulator : ScatteringAccumulator
+        Mean and squared deviations of the scattering data of the frames.
+    """
+    accumulator = ScatteringAccumulator(n, method=method, nThreads=nThreads)
+    with openTrajectory(fn) as traj:
+        for frame, X in traj.iterFrames(frames, type):  # for @jit
+            accumulator.update(X, traj.cellLengths[frame])
+
+    return accumulator
+
+
+class ScatteringAccumulator(MergeableAccumulator):
+    """Accumulate the mean and variance of scattering data over frames.
+
+    The scattering vectors stay on the integer lattice of the box, every
+    frame only pays for the wave sums. S(q) is averaged over the vectors of
+    each q-shell, and the mean and squared deviations over frames are updated
+    with Welford's algorithm and merged with the pairwise formula of Chan et
+    al., so accumulators of different parts of a trajectory merge exactly.
+    The q-vector magnitudes of each shell are averaged over the frames the
+    same way, so parts of a trajectory with a changing box merge too.
+
+    Parameters
+    ----------
+    n : ndarray
+        2D array containing the integer index of each scattering vector of `int` type.
+    shell : ndarray
+        1D array containing the shell of each scattering vector of `int` type,
+        see `qShells`, defaults to a shell for every vector.
+    method : str
+        Kernel for the wave sums, "recurrence" or "direct".
+    nThreads : int
+        Number of threads for the "recurrence" kernel.
+    """
+
+    summed = ("nFrames", "qmag", "mean", "ssd")
+    _method = "recurrence"
+    _nThreads = None
+
+    def __init__(self, n, shell=None, method="recurrence", nThreads=None):
+        """Start empty sums, see the class for the parameters."""
+        if method not in ("recurrence", "direct"):
+            raise ValueError("method must be 'recurrence' or 'direct'")
+        self.n = np.asarray(n)
+        self.shell = np.arange(self.n.shape[0]) if shell is None else shell
+        self.counts = np.bincount(self.shell)  # scattering vectors of each shell
+        self.nFrames = 0
+        self.qmag = np.zeros((self.counts.shape[0], 1))  # mean magnitude of each shell
+        self.mean = np.zeros((self.counts.shape[0], 1))
+        self.ssd = np.zeros((self.counts.shape[0], 1))  # squared deviations
+        self._method = method
+        self._nThreads = nThreads
+
+    def update(self, X, L):
+        """Add the scattering data of a frame.
+
+        Parameters
+        ----------
+        X : ndarray
+            2D array containing the coordinates of the scattering atoms of `float` type.
+        L : ndarray
+            Array of simulation box lengths of the frame of `float` type.
+        """
+        if self._method == "recurrence":
+            with numbaThreads(self._nThreads) as nThreads:
+                Sq = recurrenceInteractions(self.n, L, X, nThreads)
+        else:
+            Sq = waveInteractions(2 * np.pi * self.n / L, X)
+        Sq = np.bincount(self.shell, weights=np.ravel(Sq)) / self.counts
+        Sq = Sq.reshape(-1, 1) / X.shape[0]
+        qmag = np.linalg.norm(2 * np.pi * self.n / L, axis=1)
+        qmag = (np.bincount(self.shell, weights=qmag) / self.counts).reshape(-1, 1)
+
+        self.nFrames += 1
+        self.qmag += (qmag - self.qmag) / self.nFrames
+        delta = Sq - self.mean  # update the running mean and squared deviations
+        self.mean += delta / self.nFrames
+        self.ssd += delta * (Sq - self.mean)
+
+    def combine(self, other):
+        """Merge the means and squared deviations of a checked accumulator."""
+        if other.nFrames == 0:
+            return
+        if self.nFrames == 0:
+            self.nFrames = other.nFrames
+            self.qmag = other.qmag.copy()
+            self.mean, self.ssd = other.mean.copy(), other.ssd.copy()
+            return
+        total = self.nFrames + other.nFrames
+        self.qmag = self.qmag + (other.qmag - self.qmag) * other.nFrames / total
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.nFrames / total
+        self.ssd = (
+            self.ssd + other.ssd + delta**2 * self.nFrames * other.nFrames / total
+        )
+        self.nFrames = total
+
+    def finalize(self):
+        """Average the scattering data over the frames.
+
+        Returns
+        -------
+        qmagVec : ndarray
+            2D array containing the mean magnitude of the reciprocal space
+            vectors, q, of each shell of `float` type.
+        ds3 : ndarray
+            2D array containing time averaged scattering data, S(q), of `float` type.
+        ds3Var : ndarray
+            2D array containing the variance of S(q) between frames of `float` type.
+        """
+        if self.nFrames == 0:
+            raise ValueError("no frames were accumulated")
+        return self.qmag, self.mean, self.ssd / max(self.nFrames - 1, 1)
+
+
+def generateIndices(nmax):
+    """Create the integer indices of the scattering vectors in `generateWaves` order.
+
+    Parameters
+    ----------
+    nmax : int
+        Maximum integer index for reciprocal vector scaling.
+
+    Returns
+    -------
+    n : ndarray
+        2D array containing the integer index of each scattering vector of `int` type.
+    """
+    nk = np.arange(nmax)
+    n = np.meshgrid(nk, nk, nk, indexing="ij")  # nz runs fastest
+    return np.stack(n, axis=-1).reshape(-1, 3)
+
+
+def generateHalfSpace(nmax, spherical=True):
+    """Create integer indices covering every direction once per +/- q pair.
+
+    S(q) equals S(-q), so only the half-space nz > 0, or nz = 0 and ny > 0,
+    or nz = ny = 0 and nx > 0 is kept, which also leaves out q = 0.
+
+    Parameters
+    ----------
+    nmax : int
+        Maximum integer index for reciprocal vector scaling.
+    spherical : bool
+        Keep indices with abs(n) <= `nmax` instead of the whole cube.
+
+    Returns
+    -------
+    n : ndarray
+        2D array containing the integer index of each scattering vector of `int` type.
+    """
+    nk = np.arange(-nmax, nmax + 1)
+    n = np.stack(np.meshgrid(nk, nk, nk, indexing="ij"), axis=-1).reshape(-1, 3)
+    keep = halfSpaceMask(n)
+    if spherical:
+        keep &= np.sum(n**2, axis=1) <= nmax**2
+    return n[keep]
+
+
+def halfSpaceMask(n):
+    """Select one integer index of every +/- q pair.
+
+    Parameters
+    ----------
+    n : ndarray
+        2D array containing integer indices of scattering vectors of `int` type.
+
+    Returns
+    -------
+    mask : ndarray
+        1D array that is true for indices in the half-space of `bool` type.
+    """
+    return (n[:, 2] > 0) | (
+        (n[:, 2] == 0) & ((n[:, 1] > 0) | ((n[:, 1] == 0) & (n[:, 0] > 0)))
+    )
+
+
 def generateWaves(nmax, L):
     """Create compatible scattering vectors for the system.
 
@@ -65,18 +372,7 @@ def generateWaves(nmax, L):
     ds1 : ndarray
         2D array containing allowable scattering vectors for system geometry.
     """
-    nk = nmax
-    ds1 = np.zeros(((nk) ** 3, 3))  # create data structure to write to
-    index = 0
-
-    for nx in range(0, nk):
-        for ny in range(0, nk):
-            for nz in range(0, nk):
-                ds1[index][0] = nx
-                ds1[index][1] = ny
-                ds1[index][2] = nz
-                index += 1
-    ds1 = 2 * np.pi * ds1 / L  # q-vectors for scattering
+    ds1 = 2 * np.pi * generateIndices(nmax) / L  # q-vectors for scattering
 
     ds1 = ma.getdata(ds1)  # convert masked array into normal array for @jit
 
@@ -112,3 +408,81 @@ def waveInteractions(q, C):
         sumInit2 = 0
 
     return ds3
+
+
+@jit(nopython=True, parallel=True)
+def densityModes(n, L, C, nThreads=1):
+    """Sum plane waves of lattice vectors with per-axis phase recurrences.
+
+    The plane wave of q = 2 pi n / L factors into one phase per box axis, so
+    the phases of every index are built from one complex exponential per axis
+    by repeated multiplication instead of a cosine and sine per q-vector.
+
+    Parameters
+    ----------
+    n : ndarray
+        2D array containing the integer index of each scattering vector of `int` type.
+    L : ndarray
+        Array of simulation box lengths of `float` type.
+    C : ndarray
+        2D array containing atomic coordinates of simulation in `float` type.
+    nThreads : int
+        Number of private sums, particles are split between them in chunks.
+
+    Returns
+    -------
+    rho : ndarray
+        1D array containing the collective density, sum of exp(i q . r), of `complex` type.
+    """
+    lo = np.zeros(3, dtype=np.int64)
+    hi = np.zeros(3, dtype=np.int64)
+    for d in range(3):
+        lo[d] = n[:, d].min()
+        hi[d] = n[:, d].max()
+    width = (hi - lo).max() + 1
+
+    rho = np.zeros((nThreads, n.shape[0]), dtype=np.complex128)  # one sum per thread
+    chunk = (C.shape[0] + nThreads - 1) // nThreads
+    for t in prange(nThreads):
+        phase = np.zeros((3, width), dtype=np.complex128)
+        for i in range(t * chunk, min((t + 1) * chunk, C.shape[0])):
+            for d in range(3):  # phase tables exp(i 2 pi k x / L) for k = lo..hi
+                theta = 2 * np.pi * C[i, d] / L[d]
+                step = np.cos(theta) + 1j * np.sin(theta)
+                phase[d, 0] = np.cos(lo[d] * theta) + 1j * np.sin(lo[d] * theta)
+                for k in range(1, hi[d] - lo[d] + 1):
+                    phase[d, k] = phase[d, k - 1] * step
+            for row in range(n.shape[0]):
+                rho[t, row] += (
+                    phase[0, n[row, 0] - lo[0]]
+                    * phase[1, n[row, 1] - lo[1]]
+                    * phase[2, n[row, 2] - lo[2]]
+                )
+
+    return rho.sum(axis=0)  # reduce the private sums
+
+
+@jit(nopython=True)
+def recurrenceInteractions(n, L, C, nThreads=1):
+    """Perform wave interaction with particle calculation from phase recurrences.
+
+    Parameters
+    ----------
+    n : ndarray
+        2D array containing the integer index of each scattering vector of `int` type.
+    L : ndarray
+        Array of simulation box lengths of `float` type.
+    C : ndarray
+        2D array containing atomic coordinates of simulation in `float` type.
+    nThreads : int
+        Number of threads the particles are split between.
+
+    Returns
+    -------
+    ds3 : ndarray
+        2D array containing non-averaged scattering data, S(q), of simulation in `float` type.
+    """
+    rho = densityModes(n, L, C, nThreads)
+    ds3 = np.zeros((n.shape[0], 1))  # create data structure to write to
+    ds3[:, 0] = rho.real**2 + rho.imag**2
+    return ds3
@@ -5,3 +5,28 @@ from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ
 from pyfsmsc.reciprocalspace.Coords_to_SQ import waveInteractions
 from pyfsmsc.reciprocalspace.Coords_to_SQ import generateWaves
 from pyfsmsc.reciprocalspace.Coords_to_FSQ import Coords_to_FSQ
+from pyfsmsc.reciprocalspace.Coords_to_SQ import generateIndices
+from pyfsmsc.reciprocalspace.Coords_to_SQ import densityModes
+from pyfsmsc.reciprocalspace.Coords_to_SQ import recurrenceInteractions
+from pyfsmsc.reciprocalspace.meshSQ import Coords_to_SQ_mesh
+from pyfsmsc.reciprocalspace.meshSQ import meshDensityModes
+from pyfsmsc.reciprocalspace.qShells import Coords_to_SQ_shells
+from pyfsmsc.reciprocalspace.qShells import qShells
+from pyfsmsc.reciprocalspace.qShells import sphericalAverage
+from pyfsmsc.reciprocalspace.Coords_to_SQ import generateHalfSpace
+from pyfsmsc.reciprocalspace.Coords_to_SQ import halfSpaceMask
+from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ_frames
+from pyfsmsc.reciprocalspace.partialSQ import Coords_to_partialSQ
+from pyfsmsc.reciprocalspace.debyeSQ import debyeSQ
+from pyfsmsc.reciprocalspace.debyeSQ import Microstructures_to_SQ
+from pyfsmsc.reciprocalspace.Coords_to_FSQ import Coords_to_FQT
+from pyfsmsc.reciprocalspace.Coords_to_FSQ import shellDirections
+from pyfsmsc.reciprocalspace.Coords_to_FSQ import fftCorrelation
+from pyfsmsc.reciprocalspace.Coords_to_FSQ import selfCorrelation
+from pyfsmsc.reciprocalspace.dynamics import Coords_to_dynamics
+from pyfsmsc.reciprocalspace.dynamics import DisplacementAccumulator
+from pyfsmsc.reciprocalspace.dynamics import MSDAccumulator
+from pyfsmsc.reciprocalspace.dynamics import NonGaussianAccumulator
+from pyfsmsc.reciprocalspace.dynamics import SelfScatteringAccumulator
+from pyfsmsc.reciprocalspace.dynamics import VanHoveAccumulator
+from pyfsmsc.reciprocalspace.Coords_to_SQ import ScatteringAccumulator
@@ -0,0 +1,95 @@
+"""Include utilities for orientation averaged scattering with the Debye formula."""
+
+import numpy as np
+import numpy.ma as ma
+from pyfsmsc.realspace.Coords_to_GR import adjust_half_box
+from pyfsmsc.realspace.pairTiles import tiledHistogram
+
+
+def debyeSQ(X, q, binWidth=None, blockSize=1024):
+    """Compute orientation averaged scattering of an isolated cluster of particles.
+
+    The pair distances are histogrammed once and the Debye formula,
+    S(q) = 1 + 2 / N sum n(r) sin(q r) / (q r), is evaluated for every q as
+    one matrix-vector product over the histogram bins.
+
+    Parameters
+    ----------
+    X : ndarray
+        2D array containing atomic coordinates of the cluster in `float` type.
+    q : ndarray
+        1D array containing reciprocal space vector magnitudes, q, of `float` type.
+    binWidth : float
+        Width of the pair distance bins, defaults to 0.1 / max(q) so that the
+        phase q r is resolved to 0.1 radians.
+    blockSize : int
+        Number of particles per tile of the pair distance histogram.
+
+    Returns
+    -------
+    Sq : ndarray
+        1D array containing orientation averaged scattering data, S(q), of `float` type.
+    """
+    X = np.asarray(ma.getdata(X), dtype=float)
+    q = np.atleast_1d(np.asarray(q, dtype=float))
+    if binWidth is None:
+        binWidth = 0.1 / np.max(q)
+
+    rmax = np.linalg.norm(X.max(axis=0) - X.min(axis=0))  # bounding box diagonal
+    nHis = int(rmax / binWidth) + 1
+    edges = np.arange(nHis + 1) * binWidth
+    hist = tiledHistogram(X, None, edges, blockSize)  # unique pairs, no images
+
+    used = np.flatnonzero(hist)  # only bins holding pairs enter the product
+    r = 0.5 * (edges[used] + edges[used + 1])
+    kernel = np.sinc(np.outer(q, r) / np.pi)  # sin(q r) / (q r)
+    Sq = 1 + 2 / X.shape[0] * kernel @ hist[used]
+
+    return Sq
+
+
+def Microstructures_to_SQ(df, q, binWidth=None, blockSize=1024, L=None):
+    """Compute the Debye scattering of every microstructure from `findMicrostructures`.
+
+    The coordinates of `findMicrostructures` are wrapped into the periodic
+    box, so a microstructure crossing its boundary has pair distances close
+    to the box length. Given the box lengths, every microstructure is
+    unwrapped by minimum image relative to its first particle, which needs
+    microstructures reaching less than half the box from that particle.
+    Without them the coordinates must already be unwrapped.
+
+    Parameters
+    ----------
+    df : pd.Dataframe
+        Dataframe holds the microstructural information from findMicrostructures().
+    q : ndarray
+        1D array containing reciprocal space vector magnitudes, q, of `float` type.
+    binWidth : float
+        Width of the pair distance bins, see `debyeSQ`.
+    blockSize : int
+        Number of particles per tile of the pair distance histogram.
+    L : ndarray
+        Array of lengths of the simulation box the coordinates are wrapped
+        into of `float` type.
+
+    Returns
+    -------
+    clusterIDs : ndarray
+        1D array containing the ID of each microstructure of `int` type.
+    Sq : ndarray
+        2D array containing the scattering data, S(q), of each microstructure in rows.
+    """
+    coords = df[["atomCoordx", "atomCoordy", "atomCoordz"]].to_numpy()
+    clusterIDs, inverse = np.unique(df["clusterID"].to_numpy(), return_inverse=True)
+
+    order = np.argsort(inverse, kind="stable")  # group the particles by cluster
+    bounds = np.cumsum(np.bincount(inverse, minlength=clusterIDs.shape[0]))
+    clusters = np.split(coords[order], bounds[:-1])
+
+    Sq = np.zeros((clusterIDs.shape[0], np.size(q)))
+    for k, X in enumerate(clusters):
+        if L is not None:  # undo the wrapping into the periodic box
+            X = X[0] + adjust_half_box(X - X[0], np.asarray(L, dtype=float))
+        Sq[k] = debyeSQ(X, q, binWidth, blockSize)
+
+    return clusterIDs, Sq
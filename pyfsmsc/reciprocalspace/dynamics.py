@@ -0,0 +1,298 @@
+"""Include utilities for calculating single particle dynamics in one trajectory pass."""
+
+import numpy as np
+from abc import ABC, abstractmethod
+from pyfsmsc.helpfunctions.accumulators import MergeableAccumulator
+from pyfsmsc.helpfunctions.trajectory import openTrajectory
+from pyfsmsc.reciprocalspace.Coords_to_FSQ import shellDirections
+
+
+def Coords_to_dynamics(
+    fn,
+    type,
+    accumulators,
+    start=0,
+    stop=None,
+    stride=1,
+    maxLag=None,
+    originStride=1,
+    unwrap=True,
+    originStop=None,
+):
+    """Feed the particle displacements of a trajectory to dynamics accumulators.
+
+    Each frame is read once and kept in a ring buffer of the last `maxLag` + 1
+    frames, so the memory is bounded by the longest lag. The displacement
+    from every buffered time origin to the new frame is handed to every
+    accumulator, so all quantities share the same multiple origin average.
+    The box may change between frames, every displacement is passed on with
+    the box lengths of its later frame.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to netCDF4 file or LAMMPS dump, or an open `FrameReader`.
+    type : int
+        Atom type to follow.
+    accumulators : list
+        Accumulators, e.g. `MSDAccumulator`, `NonGaussianAccumulator`,
+        `SelfScatteringAccumulator` and `VanHoveAccumulator`.
+    start : int
+        First frame of the netCDF4 trajectory.
+    stop : int
+        Frame to stop before, defaults to the end of the trajectory.
+    stride : int
+        Step between the frames read.
+    maxLag : int
+        Largest lag in read frames, defaults to every lag.
+    originStride : int
+        Step between the read frames used as time origins.
+    unwrap : bool
+        Unwrap the coordinates by adding up the minimum image steps between
+        the stored frames, needed for displacements longer than half a box.
+    originStop : int
+        Frame to stop using time origins before, defaults to `stop`. Later
+        frames only complete the lags of earlier origins, so parts of a
+        trajectory run with start=a, originStop=b and stop=b + maxLag * stride,
+        with a and b multiples of originStride * stride, give accumulators
+        that merge into those of the whole trajectory.
+
+    Returns
+    -------
+    x : ndarray
+        1D array containing the lag time of each lag of `float` type.
+    results : list
+        Finalized result of each accumulator, see their `finalize` methods.
+    """
+    with openTrajectory(fn) as traj:  # read data once
+        frames = traj.frames(start, stop, stride)
+        nLags = len(frames) if maxLag is None else min(maxLag + 1, len(frames))
+        nOrigins = len(frames)
+        if originStop is not None:
+            nOrigins = len(traj.frames(start, originStop, stride))
+
+        x = traj.time[list(frames[:nLags])] - traj.time[frames[0]]
+
+        for accumulator in accumulators:
+            accumulator.start(nLags)
+
+        buffer = None  # ring buffer of the last nLags frames
+        for k, (frame, X) in enumerate(traj.iterFrames(frames, type, ordered=True)):
+            L = traj.cellLengths[frame]  # cell coordinates
+            if buffer is None:
+                buffer = np.zeros((nLags,) + X.shape)
+                previous = X
+            elif unwrap:  # add the minimum image step between the stored frames
+                step = X - previous
+                previous = X
+                X = buffer[(k - 1) % nLags] + step - L * np.rint(step / L)
+            buffer[k % nLags] = X
+
+            for lag in range(min(k + 1, nLags)):
+                if (k - lag) % originStride or k - lag >= nOrigins:
+                    continue  # not a time origin
+                dX = X - buffer[(k - lag) % nLags]
+                for accumulator in accumulators:
+                    accumulator.update(lag, dX, L)
+
+    return x, [accumulator.finalize() for accumulator in accumulators]
+
+
+class DisplacementAccumulator(MergeableAccumulator, ABC):
+    """Sum a quantity of the particle displacements for every lag.
+
+    Subclasses set `nColumns`, the number of sums kept per lag, and implement
+    `measure` and `finalize`. The sums of parts of a trajectory merge, see
+    `originStop` of `Coords_to_dynamics`.
+    """
+
+    summed = ("sums", "counts")
+    nColumns = 1
+
+    def start(self, nLags):
+        """Reset the sums before a trajectory pass.
+
+        Parameters
+        ----------
+        nLags : int
+            Number of lags, starting at zero.
+        """
+        self.sums = np.zeros((nLags, self.nColumns))
+        self.counts = np.zeros(nLags, dtype=np.int64)  # particles times origins
+
+    def update(self, lag, dX, L):
+        """Add the displacements of one time origin and lag.
+
+        Parameters
+        ----------
+        lag : int
+            Lag of the displacements in frames.
+        dX : ndarray
+            2D array containing the particle displacements of `float` type.
+        L : ndarray
+            Array of simulation box lengths at the end of the lag of `float` type.
+        """
+        self.sums[lag] += self.measure(dX, L)
+        self.counts[lag] += dX.shape[0]
+
+    @abstractmethod
+    def measure(self, dX, L):
+        """Sum the quantity over the particles, see `update` for the parameters."""
+
+    @abstractmethod
+    def finalize(self):
+        """Average the sums over the particles and time origins."""
+
+
+class MSDAccumulator(DisplacementAccumulator):
+    """Accumulate the mean squared displacement."""
+
+    def measure(self, dX, L):
+        """Sum the squared displacements, see `update` for the parameters."""
+        return np.einsum("ij,ij->", dX, dX)
+
+    def finalize(self):
+        """Average the squared displacements.
+
+        Returns
+        -------
+        msd : ndarray
+            1D array containing the mean squared displacement of each lag of `float` type.
+        """
+        return self.sums[:, 0] / self.counts
+
+
+class NonGaussianAccumulator(DisplacementAccumulator):
+    """Accumulate the non-Gaussian parameter."""
+
+    nColumns = 2
+
+    def measure(self, dX, L):
+        """Sum the second and fourth displacement powers, see `update`."""
+        r2 = np.einsum("ij,ij->i", dX, dX)
+        return r2.sum(), (r2**2).sum()
+
+    def finalize(self):
+        """Compute alpha_2 = 3 <r^4> / (5 <r^2>^2) - 1.
+
+        Returns
+        -------
+        alpha2 : ndarray
+            1D array containing the non-Gaussian parameter of each lag of `float`
+            type, zero at the zero lag.
+        """
+        r2 = self.sums[:, 0] / self.counts
+        r4 = self.sums[:, 1] / self.counts
+        alpha2 = np.zeros_like(r2)
+        moving = r2 > 0
+        alpha2[moving] = 3 * r4[moving] / (5 * r2[moving] ** 2) - 1
+        return alpha2
+
+
+class SelfScatteringAccumulator(DisplacementAccumulator):
+    """Accumulate the self intermediate scattering function.
+
+    The scattering vectors are the lattice directions of the box at the end of
+    each lag, so they follow the box of a variable volume trajectory and the
+    magnitudes returned are averaged over the displacements.
+
+    Parameters
+    ----------
+    n : int
+        Integer magnitude, or list of magnitudes, of the reciprocal vector
+        indices, see `Coords_to_FSQ`.
+    maxDirections : int
+        Largest number of directions per magnitude, more are randomly subsampled.
+    seed : int
+        Seed of the direction subsampling.
+    """
+
+    summed = ("sums", "counts", "qSums")
+
+    def __init__(self, n, maxDirections=None, seed=0):
+        """Choose the lattice directions, see the class for the parameters."""
+        directions = shellDirections(n, maxDirections, seed)
+        self.indices = np.concatenate(directions)  # every direction of every shell
+        self.shell = np.repeat(np.arange(len(directions)), [len(d) for d in directions])
+        self.nColumns = len(directions)
+
+    def start(self, nLags):
+        """Reset the sums and the scattering vector magnitudes."""
+        super().start(nLags)
+        self.qSums = np.zeros(self.nColumns)  # shell magnitudes times particles
+
+    def update(self, lag, dX, L):
+        """Add the displacements and the magnitudes of the box vectors."""
+        super().update(lag, dX, L)
+        qmag = np.linalg.norm(2 * np.pi * self.indices / L, axis=1)
+        self.qSums += dX.shape[0] * self.shellMean(qmag)
+
+    def measure(self, dX, L):
+        """Sum cos(q . dr) averaged over each shell, see `update`."""
+        q = 2 * np.pi * self.indices / L
+        return self.shellMean(np.cos(dX @ q.T).sum(axis=0))
+
+    def shellMean(self, a):
+        """Average a value of every direction over each shell.
+
+        Parameters
+        ----------
+        a : ndarray
+            1D array of a value of each direction of `float` type.
+
+        Returns
+        -------
+        mean : ndarray
+            1D array of the mean value of each shell of `float` type.
+        """
+        return np.bincount(self.shell, weights=a) / np.bincount(self.shell)
+
+    def finalize(self):
+        """Average the phases.
+
+        Returns
+        -------
+        qmag : ndarray
+            1D array containing the magnitude of the reciprocal space vectors, q, of `float` type.
+        Fs : ndarray
+            2D array containing self intermediate scattering data, Fs(q, t), of
+            each magnitude in rows of `float` type.
+        """
+        return self.qSums / self.counts.sum(), (self.sums / self.counts[:, None]).T
+
+
+class VanHoveAccumulator(DisplacementAccumulator):
+    """Accumulate the self part of the van Hove correlation function.
+
+    Parameters
+    ----------
+    rMax : float
+        Largest displacement histogrammed.
+    nHis : int
+        Number of histogram bins.
+    """
+
+    def __init__(self, rMax, nHis):
+        """Build the histogram bins, see the class for the parameters."""
+        self.edges = np.linspace(0, rMax, nHis + 1)
+        self.nColumns = nHis
+
+    def measure(self, dX, L):
+        """Histogram the displacement lengths, see `update`."""
+        idx = (np.sqrt(np.einsum("ij,ij->i", dX, dX)) / self.edges[1]).astype(np.int64)
+        return np.bincount(idx[idx < self.nColumns], minlength=self.nColumns)
+
+    def finalize(self):
+        """Normalize the histograms by the shell volumes.
+
+        Returns
+        -------
+        re : ndarray
+            1D array containing the center of each displacement bin of `float` type.
+        Gs : ndarray
+            2D array containing the self van Hove function, Gs(r, t), of each lag
+            in rows of `float` type, with 4 pi r^2 Gs(r, t) integrating to one.
+        """
+        re = 0.5 * (self.edges[1:] + self.edges[:-1])
+        shellVolume = 4 / 3 * np.pi * np.diff(self.edges**3)
+        return re, self.sums / self.counts[:, None] / shellVolume
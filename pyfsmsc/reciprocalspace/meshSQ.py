@@ -0,0 +1,174 @@
+"""Include utilities for calculating reciprocal space scattering on a particle mesh."""
+
+import numpy as np
+import numpy.ma as ma
+import scipy.fft
+from pyfsmsc.helpfunctions.trajectory import openTrajectory
+from pyfsmsc.reciprocalspace.Coords_to_SQ import halfSpaceMask
+
+
+def Coords_to_SQ_mesh(
+    fn, type, qmax, frame, nGrid=None, order=3, interlace=True, chunkSize=1000000
+):
+    """Convert atomic coordinates into scattering data with a particle-mesh FFT.
+
+    The particles are assigned to a periodic grid, the grid is Fourier
+    transformed once and the assignment window is divided out, which gives
+    S(q) of every lattice q-vector up to `qmax` in O(N + M log M) for M grid
+    points. With the default grid, triangular shaped cloud assignment and
+    interlacing, S(q) matches the direct sum of `Coords_to_SQ` to an absolute
+    tolerance of 5e-3 for q <= qmax / 2 and of 5e-2 up to `qmax`.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to netCDF4 file or LAMMPS dump, or an open `FrameReader`.
+    type : int
+        Atom type for scattering.
+    qmax : float
+        Largest magnitude of the reciprocal space vectors returned.
+    frame : int
+        Frame of the netCDF4 trajectory to compute structure factor.
+    nGrid : int
+        Number of grid points along each box length, defaults to the fast FFT
+        size with a Nyquist wavenumber of at least 2 `qmax`.
+    order : int
+        Assignment order, 1 nearest grid point, 2 cloud-in-cell or 3 triangular
+        shaped cloud.
+    interlace : bool
+        Average a second grid shifted by half a cell to cancel the leading
+        aliased images.
+    chunkSize : int
+        Number of particles assigned to the grid at once.
+
+    Returns
+    -------
+    qmagVec : ndarray
+        2D array containing magnitude of reciprocal space vector, q, of `float` type.
+    ds3 : ndarray
+        2D array containing non-averaged scattering data, S(q), of simulation in `float` type.
+    n : ndarray
+        2D array containing the integer index of each scattering vector of `int` type.
+    """
+    with openTrajectory(fn) as traj:  # read data
+        X = traj.positions(frame, type)  # get atom type
+        L = traj.cellLengths[frame]  # cell coordinates
+
+    if nGrid is None:
+        nGrid = [
+            scipy.fft.next_fast_len(int(np.ceil(2 * qmax * Ld / np.pi)) + 1) for Ld in L
+        ]  # Nyquist pi Ng / L of at least 2 qmax
+    nGrid = np.broadcast_to(np.asarray(nGrid, dtype=np.int64), (3,))
+
+    rho = meshDensityModes(X, L, nGrid, order, 0.0, chunkSize)
+    if interlace:
+        rhoShift = meshDensityModes(X, L, nGrid, order, 0.5, chunkSize)
+        rho = 0.5 * (rho + rhoShift)
+
+    # integer indices of the half-space of the real FFT
+    nx = np.fft.fftfreq(nGrid[0], 1 / nGrid[0]).astype(np.int64)
+    ny = np.fft.fftfreq(nGrid[1], 1 / nGrid[1]).astype(np.int64)
+    nz = np.arange(nGrid[2] // 2 + 1)
+    n = np.stack(np.meshgrid(nx, ny, nz, indexing="ij"), axis=-1).reshape(-1, 3)
+    qmag = np.linalg.norm(2 * np.pi * n / L, axis=1)
+
+    keep = halfSpaceMask(n) & (qmag <= qmax)  # drop q = 0 and -q copies
+
+    ds3 = (np.abs(rho.reshape(-1)[keep]) ** 2 / X.shape[0]).reshape(-1, 1)
+    qmagVec = qmag[keep].reshape(-1, 1)
+
+    return qmagVec, ds3, n[keep]
+
+
+def meshDensityModes(X, L, nGrid, order=3, shift=0.0, chunkSize=1000000):
+    """Assign particles to a periodic grid and Fourier transform the density.
+
+    Parameters
+    ----------
+    X : ndarray
+        2D array containing atomic coordinates of simulation in `float` type.
+    L : ndarray
+        Array of simulation box lengths of `float` type.
+    nGrid : ndarray
+        Number of grid points along each box length of `int` type.
+    order : int
+        Assignment order, 1 nearest grid point, 2 cloud-in-cell or 3 triangular
+        shaped cloud.
+    shift : float
+        Offset of the grid points in units of the grid spacing.
+    chunkSize : int
+        Number of particles assigned to the grid at once.
+
+    Returns
+    -------
+    rho : ndarray
+        3D array of the real FFT of the particle density, sum of exp(-i q . r),
+        divided by the assignment window of `complex` type.
+    """
+    if order not in (1, 2, 3):
+        raise ValueError("order must be 1, 2 or 3")
+    X = np.asarray(ma.getdata(X), dtype=float)
+    nGrid = np.asarray(nGrid, dtype=np.int64)
+
+    grid = np.zeros(np.prod(nGrid))
+    for i0 in range(0, X.shape[0], chunkSize):
+        u = X[i0:][:chunkSize] / L * nGrid - shift  # position in grid units
+        idx, w = assignmentWeights(u, order)
+        flat = np.zeros((u.shape[0],) + (order,) * 3, dtype=np.int64)
+        weight = np.ones(flat.shape)
+        for d in range(3):  # outer product of the per-axis stencils
+            shape = [u.shape[0], 1, 1, 1]
+            shape[d + 1] = order
+            flat = flat * nGrid[d] + (idx[:, d] % nGrid[d]).reshape(shape)
+            weight = weight * w[:, d].reshape(shape)
+        grid += np.bincount(flat.ravel(), weights=weight.ravel(), minlength=grid.size)
+
+    rho = scipy.fft.rfftn(grid.reshape(nGrid))
+
+    for d in range(3):  # deconvolve the assignment window sinc(n / Ng) ** order
+        nd = np.fft.fftfreq(nGrid[d], 1 / nGrid[d])
+        if d == 2:  # real FFT axis holds the non-negative indices only
+            nd = np.arange(rho.shape[2])
+        window = np.sinc(nd / nGrid[d]) ** order
+        phase = np.exp(-2j * np.pi * nd * shift / nGrid[d])  # undo the grid shift
+        shape = [1, 1, 1]
+        shape[d] = nd.shape[0]
+        rho /= (window / phase).reshape(shape)
+
+    return rho
+
+
+def assignmentWeights(u, order):
+    """Compute the grid points and weights of the particle assignment stencil.
+
+    Parameters
+    ----------
+    u : ndarray
+        2D array of particle positions in units of the grid spacing of `float` type.
+    order : int
+        Assignment order, 1 nearest grid point, 2 cloud-in-cell or 3 triangular
+        shaped cloud.
+
+    Returns
+    -------
+    idx : ndarray
+        3D array of the unwrapped grid point of each particle, axis and stencil entry.
+    w : ndarray
+        3D array of the assignment weight of each particle, axis and stencil entry.
+    """
+    if order == 1:
+        idx = np.rint(u).astype(np.int64)[..., None]
+        w = np.ones(idx.shape)
+    elif order == 2:
+        k0 = np.floor(u)
+        f = u - k0
+        idx = k0.astype(np.int64)[..., None] + np.arange(2)
+        w = np.stack((1 - f, f), axis=-1)
+    else:
+        k0 = np.rint(u)
+        f = u - k0
+        idx = k0.astype(np.int64)[..., None] + np.arange(-1, 2)
+        w = np.stack(
+            (0.5 * (0.5 - f) ** 2, 0.75 - f**2, 0.5 * (0.5 + f) ** 2), axis=-1
+        )
+    return idx, w
@@ -0,0 +1,104 @@
+"""Include utilities for calculating partial structure factors from coordinates."""
+
+import numpy as np
+from pyfsmsc.helpfunctions.helper import numbaThreads
+from pyfsmsc.helpfunctions.trajectory import openTrajectory
+from pyfsmsc.reciprocalspace.Coords_to_SQ import densityModes
+from pyfsmsc.reciprocalspace.Coords_to_SQ import generateIndices, generateHalfSpace
+
+
+def Coords_to_partialSQ(
+    fn,
+    nmax,
+    frame,
+    types=None,
+    convention="AL",
+    scatteringLengths=None,
+    waves="octant",
+    nThreads=None,
+):
+    """Convert atomic coordinates into every partial structure factor.
+
+    The collective density of each species is summed once over a shared set
+    of scattering vectors and every partial is formed from the densities,
+    so the cost is one wave sum per species instead of one per pair.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to netCDF4 file or LAMMPS dump, or an open `FrameReader`.
+    nmax : int
+        Maximum integer index for reciprocal vectors.
+    frame : int
+        Frame of the netCDF4 trajectory to compute structure factor.
+    types : list
+        Atom types to include, defaults to every type in the frame. Every type
+        must have atoms in the frame.
+    convention : str
+        "AL" for Ashcroft-Langreth partials, Re[rho_a rho_b*] / sqrt(N_a N_b),
+        or "FZ" for Faber-Ziman partials, 1 + (S_ab^AL - delta_ab) / sqrt(c_a c_b).
+    scatteringLengths : list
+        Scattering length of each type in `types`, also returns the weighted
+        total structure factor when given.
+    waves : str
+        Scattering vectors, "octant" or "halfspace", see `Coords_to_SQ`.
+    nThreads : int
+        Number of threads for the wave sums.
+
+    Returns
+    -------
+    qmagVec : ndarray
+        2D array containing magnitude of reciprocal space vector, q, of `float` type.
+    types : ndarray
+        1D array of the atom types of each partial of `int` type.
+    Sab : ndarray
+        3D array containing the partial structure factors of atom types `types[a]`
+        and `types[b]` in Sab[a, b] of `float` type.
+    ds3 : ndarray
+        2D array containing the total structure factor weighted by the scattering
+        lengths, sum of b_a b_b Re[rho_a rho_b*] / (N <b^2>), only returned when
+        `scatteringLengths` is given.
+    """
+    if waves == "octant":
+        n = generateIndices(nmax)
+    elif waves == "halfspace":
+        n = generateHalfSpace(nmax)
+    else:
+        raise ValueError("waves must be 'octant' or 'halfspace'")
+    if convention not in ("AL", "FZ"):
+        raise ValueError("convention must be 'AL' or 'FZ'")
+
+    with openTrajectory(fn) as traj:  # read data
+        X = traj.coordinates(frame)  # plain arrays for @jit
+        atomTypes = traj.atomVariable("atom_types", frame)
+        L = traj.cellLengths[frame]  # cell coordinates
+
+    types = np.unique(atomTypes) if types is None else np.asarray(types)
+    nSpecies = types.shape[0]
+
+    rho = np.zeros((nSpecies, n.shape[0]), dtype=np.complex128)
+    Npart = np.zeros(nSpecies)
+    with numbaThreads(nThreads) as nThreads:
+        for a in range(nSpecies):  # one density field per species
+            Xa = np.ascontiguousarray(X[atomTypes == types[a]])
+            Npart[a] = Xa.shape[0]
+            if Npart[a] == 0:  # the partials would divide by zero
+                raise ValueError("frame %d has no atoms of type %d" % (frame, types[a]))
+            rho[a] = densityModes(n, L, Xa, nThreads)
+
+    cross = np.real(rho[:, None, :] * np.conj(rho[None, :, :]))  # Re[rho_a rho_b*]
+    Sab = cross / np.sqrt(np.outer(Npart, Npart))[:, :, None]
+    if convention == "FZ":
+        c = Npart / Npart.sum()  # concentrations
+        delta = np.eye(nSpecies)[:, :, None]
+        Sab = 1 + (Sab - delta) / np.sqrt(np.outer(c, c))[:, :, None]
+
+    qmagVec = np.linalg.norm(2 * np.pi * n / L, axis=1).reshape(-1, 1)
+
+    if scatteringLengths is None:
+        return qmagVec, types, Sab
+
+    b = np.asarray(scatteringLengths, dtype=float)
+    ds3 = np.einsum("a,b,abq->q", b, b, cross) / np.sum(Npart * b**2)
+
+    return qmagVec, types, Sab, ds3.reshape(-1, 1)
@@ -0,0 +1,165 @@
+"""Include utilities for spherically averaging scattering over q-shells."""
+
+from functools import lru_cache
+import numpy as np
+import numpy.ma as ma
+from pyfsmsc.helpfunctions.helper import numbaThreads
+from pyfsmsc.helpfunctions.trajectory import openTrajectory
+from pyfsmsc.reciprocalspace.Coords_to_SQ import densityModes, generateIndices
+from pyfsmsc.reciprocalspace.Coords_to_SQ import generateHalfSpace
+
+
+def Coords_to_SQ_shells(
+    fn,
+    type,
+    nmax,
+    frame,
+    binWidth,
+    maxPerShell=None,
+    seed=0,
+    nThreads=None,
+    waves="octant",
+):
+    """Convert atomic coordinates into scattering data averaged over q-shells.
+
+    Parameters
+    ----------
+    fn : str or FrameReader
+        Path to netCDF4 file or LAMMPS dump, or an open `FrameReader`.
+    type : int
+        Atom type for scattering.
+    nmax : int
+        Maximum integer index for reciprocal vectors.
+    frame : int
+        Frame of the netCDF4 trajectory to compute structure factor.
+    binWidth : float
+        Width of the q-shells.
+    maxPerShell : int
+        Largest number of q-vectors kept per shell, larger shells are randomly
+        subsampled, defaults to every q-vector.
+    seed : int
+        Seed of the subsampling so repeated calls use the same q-vectors.
+    nThreads : int
+        Number of threads for the wave sums.
+    waves : str
+        Scattering vectors, "octant" or "halfspace", see `Coords_to_SQ`.
+
+    Returns
+    -------
+    qShell : ndarray
+        1D array containing the mean magnitude of the q-vectors of each shell of `float` type.
+    Sq : ndarray
+        1D array containing the shell averaged scattering data, S(q), of `float` type.
+    counts : ndarray
+        1D array containing the number of q-vectors in each shell of `int` type.
+    stderr : ndarray
+        1D array containing the standard error of the shell averages of `float` type.
+    """
+    with openTrajectory(fn) as traj:  # read data
+        X = traj.positions(frame, type)  # get atom type
+        L = traj.cellLengths[frame]  # cell coordinates
+
+    n, shell, qShell, counts = qShells(nmax, L, binWidth, maxPerShell, seed, waves)
+
+    with numbaThreads(nThreads) as nThreads:
+        rho = densityModes(n, L, X, nThreads)
+    ds3 = (rho.real**2 + rho.imag**2) / X.shape[0]
+
+    Sq, stderr = sphericalAverage(ds3, shell, counts)
+
+    return qShell, Sq, counts, stderr
+
+
+def qShells(nmax, L, binWidth, maxPerShell=None, seed=0, waves="octant"):
+    """Assign the scattering vectors of a box to q-shells, cached per box.
+
+    Parameters
+    ----------
+    nmax : int
+        Maximum integer index for reciprocal vectors.
+    L : ndarray
+        Array of simulation box lengths of `float` type.
+    binWidth : float
+        Width of the q-shells.
+    maxPerShell : int
+        Largest number of q-vectors kept per shell, larger shells are randomly
+        subsampled, defaults to every q-vector.
+    seed : int
+        Seed of the subsampling.
+    waves : str
+        Scattering vectors, "octant" or "halfspace", see `Coords_to_SQ`.
+
+    Returns
+    -------
+    n : ndarray
+        2D array containing the integer index of each kept scattering vector of `int` type.
+    shell : ndarray
+        1D array containing the shell of each kept scattering vector of `int` type.
+    qShell : ndarray
+        1D array containing the mean magnitude of the q-vectors of each shell of `float` type.
+    counts : ndarray
+        1D array containing the number of kept q-vectors in each shell of `int` type.
+    """
+    L = tuple(float(Ld) for Ld in ma.getdata(L))  # hashable key for the cache
+    return _qShells(int(nmax), L, float(binWidth), maxPerShell, seed, waves)
+
+
+@lru_cache(maxsize=32)
+def _qShells(nmax, L, binWidth, maxPerShell, seed, waves):
+    """Build the q-shell index for `qShells`, see there for the parameters."""
+    if waves == "octant":
+        n = generateIndices(nmax)
+        n = n[np.any(n != 0, axis=1)]  # q = 0 is the particle number, not structure
+    elif waves == "halfspace":
+        n = generateHalfSpace(nmax)
+    else:
+        raise ValueError("waves must be 'octant' or 'halfspace'")
+    qmag = np.linalg.norm(2 * np.pi * n / np.array(L), axis=1)
+    shell = (qmag / binWidth).astype(np.int64)
+
+    if maxPerShell is not None:  # random rank of each q-vector inside its shell
+        key = np.random.default_rng(seed).random(shell.shape[0])
+        order = np.lexsort((key, shell))
+        first = np.searchsorted(shell[order], shell[order])
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.shape[0]) - first
+        keep = rank < maxPerShell
+        n, qmag, shell = n[keep], qmag[keep], shell[keep]
+
+    counts = np.bincount(shell)
+    filled = np.flatnonzero(counts)  # renumber the shells without empty ones
+    shell = np.searchsorted(filled, shell)
+    counts = counts[filled]
+    qShell = np.bincount(shell, weights=qmag) / counts
+
+    for arr in (n, shell, qShell, counts):
+        arr.setflags(write=False)  # the cache hands out the same arrays
+    return n, shell, qShell, counts
+
+
+def sphericalAverage(ds3, shell, counts):
+    """Average scattering data over q-shells.
+
+    Parameters
+    ----------
+    ds3 : ndarray
+        1D array containing non-averaged scattering data, S(q), of `float` type.
+    shell : ndarray
+        1D array containing the shell of each scattering vector of `int` type.
+    counts : ndarray
+        1D array containing the number of scattering vectors in each shell of `int` type.
+
+    Returns
+    -------
+    Sq : ndarray
+        1D array containing the shell averaged scattering data, S(q), of `float` type.
+    stderr : ndarray
+        1D array containing the standard error of the shell averages of `float` type,
+        zero for shells of a single q-vector.
+    """
+    ds3 = np.ravel(ds3)
+    Sq = np.bincount(shell, weights=ds3, minlength=counts.shape[0]) / counts
+    sq = np.bincount(shell, weights=(ds3 - Sq[shell]) ** 2, minlength=counts.shape[0])
+    stderr = np.sqrt(sq / np.maximum(counts - 1, 1) / counts)
+
+    return Sq, stderr
@@ -5,9 +5,10 @@ import numpy as np
 from numba import jit
 import pandas as pd
 from scipy.signal import savgol_filter
+from pyfsmsc.helpfunctions.sineTransform import SineTransform
 
 
-def SQ_to_RDF(q, sq, density, rmin, rmax, nrs):
+def SQ_to_RDF(q, sq, density, rmin, rmax, nrs, plan=None, method="auto", window=None):
     """Convert recriprocal space scattering data into real space radial distribution data.
 
     Parameters
@@ -15,7 +16,8 @@ def SQ_to_RDF(q, sq, density, rmin, rmax, nrs):
     q : ndarray
         1D array containing reciprocal space vector magnitudes, q, of `float` type.
     sq : ndarray
-        1D array containing static structure factor values, S(q), of `float` type.
+        1D array containing static structure factor values, S(q), of `float` type,
+        or 2D array of a structure factor in each row.
     density : float
         Number density of the species with scattering data.
     rmin : float
@@ -24,22 +26,25 @@ def SQ_to_RDF(q, sq, density, rmin, rmax, nrs):
         Maximum x-value for the real space conversion.
     nrs : int
         Number of points to map recriprocal space to real space.
+    plan : SineTransform
+        Precomputed transform from `q` to the r grid, reused across calls
+        instead of `rmin`, `rmax` and `nrs` when given.
+    method : str
+        "dense", "dst", "filon" or "auto" evaluation of a new plan, see
+        `SineTransform`.
+    window : str
+        "lorch" to damp truncation ripples of a new plan, see `SineTransform`.
 
     Returns
     -------
     rs : ndarray
         1D array containing real space vector magnitudes, r, of `float` type.
     Grs : ndarray
-        1D array containing radial distribution values, G(r), of `float` type.
+        1D array containing radial distribution values, G(r), of `float` type,
+        or 2D array with a row for each row of `sq`.
     """
-    qs = q
-    dq = q[1] - q[0]  # get integration spacing
-    SQs = sq - 1  # adjust structure factor
-    rs = np.linspace(rmin, rmax, num=nrs)
-    Grs = np.zeros(rs.shape[0])
-    for rind, r in enumerate(rs):  # integrate
-        g = 0
-        for qind, q in enumerate(qs):
-            g += dq * q * np.sin(q * r) * SQs[qind]
-            Grs[rind] = 1 + 1 / ((np.pi) ** 2 * density * 2) * g / r
-    return rs, Grs
+    if plan is None:
+        plan = SineTransform(q, np.linspace(rmin, rmax, num=nrs), method, window)
+    SQs = np.asarray(sq, dtype=float) - 1  # adjust structure factor
+    Grs = 1 + 1 / ((np.pi) ** 2 * density * 2) * plan.apply(SQs)  # integrate
+    return plan.k, Grs
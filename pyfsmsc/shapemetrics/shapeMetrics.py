@@ -6,6 +6,7 @@ import numpy as np
 import matplotlib.pylab as plt
 import pandas as pd
 from numpy import linalg as LA
+from pyfsmsc.helpfunctions.trajectory import openTrajectory
 
 
 def findMicrostructures(fn):
@@ -13,64 +14,43 @@ def findMicrostructures(fn):
 
     Parameters
     ----------
-    fn : str
-        The path is the netCDF4 trajectory.
+    fn : str or FrameReader
+        The path is the netCDF4 trajectory or LAMMPS dump, or an open `FrameReader`.
 
     Returns
     -------
     df : pdDataframe
         Atomic coordinates and types of atoms.
     """
-    ds = nc.Dataset(fn)
-
-    mask = ds["c_clst"][0, :] != 0  # grab atoms that belong to cluster
-    vals = ds["c_clst"][0, mask]
-    atoms = ds["identifier"][0, mask]  # grab id's of atoms in cluster
+    with openTrajectory(fn) as traj:
+        clst = traj.atomVariable("c_clst", 0)
+        mask = clst != 0  # grab atoms that belong to cluster
+        vals = clst[mask]
+        atoms = traj.atomVariable("identifier", 0)[mask]  # grab id's of cluster atoms
+        coords = traj.coordinates(0)[mask]
 
     atomCluster = np.vstack((vals, atoms)).T
     df = pd.DataFrame(
         atomCluster, columns=["clusterID", "atomID"]
     )  # create data structure
 
-    Clusters = df["clusterID"]
-    Clusters = Clusters.astype(int)  # change data type
-
-    sizeClusters = np.arange(0, 0)
-
-    for i in Clusters:
-        sizeClusters = np.append(
-            sizeClusters, len(df[df["clusterID"] == i])
-        )  # calculate size of clusters
-    df = df.assign(clusterSize=sizeClusters)
-
-    df["clusterID"] = df["clusterID"].astype(int)
+    df["clusterID"] = df["clusterID"].astype(int)  # change data type
     df["atomID"] = df["atomID"].astype(int)
 
-    coords = ds["coordinates"][0][mask]
+    clusterID = df["clusterID"]
+    _, cluster = np.unique(
+        clusterID.to_numpy(), return_inverse=True
+    )  # index of the cluster of every atom
+    sizes = np.bincount(cluster)
+    df = df.assign(clusterSize=sizes[cluster])  # calculate size of clusters
 
     df = df.assign(
         atomCoordx=coords[:, 0], atomCoordy=coords[:, 1], atomCoordz=coords[:, 2]
     )  # append atomic coordinates to dataframe
 
-    m = 1
-    xcmv = ycmv = zcmv = np.arange(0, 0)
-
-    clusterID = df["clusterID"]
-    for item in clusterID:  # calculate center of mass of microstructures
-        ID = item
-        xcm = sum(df[df["clusterID"] == ID]["atomCoordx"] * m) / len(
-            df[df["clusterID"] == ID]
-        )
-        ycm = sum(df[df["clusterID"] == ID]["atomCoordy"] * m) / len(
-            df[df["clusterID"] == ID]
-        )
-        zcm = sum(df[df["clusterID"] == ID]["atomCoordz"] * m) / len(
-            df[df["clusterID"] == ID]
-        )
-        xcmv = np.append(xcmv, xcm)
-        ycmv = np.append(ycmv, ycm)
-        zcmv = np.append(zcmv, zcm)
-    df = df.assign(xcm=xcmv, ycm=ycmv, zcm=zcmv)
+    for axis in "xyz":  # calculate center of mass of microstructures
+        com = np.bincount(cluster, weights=df["atomCoord" + axis].to_numpy()) / sizes
+        df = df.assign(**{axis + "cm": com[cluster]})
 
     return df, clusterID
 
@@ -0,0 +1,111 @@
+"""Tests the coordinates to self intermediate scattering utility."""
+
+import pyfsmsc
+import pytest
+import netCDF4 as nc
+from pyfsmsc.helpfunctions.readers import ArrayReader
+from pyfsmsc.reciprocalspace.Coords_to_FSQ import Coords_to_FSQ, Coords_to_FQT
+from pyfsmsc.reciprocalspace.Coords_to_FSQ import shellDirections
+from pyfsmsc.reciprocalspace.Coords_to_SQ import generateHalfSpace
+import numpy as np
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def test_Coords_to_FSQ():
+    """Test the multiple origin self intermediate scattering, Fs(q, t).
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+
+    x, qmag, Fs = Coords_to_FSQ(
+        fn, type=2, n=[2, 5], stride=2, maxLag=6, chunkSize=100
+    )  # call function
+
+    assert Fs.shape == (2, 7)
+    assert np.allclose(Fs[:, 0], 1)
+    assert np.allclose(x, 20 * np.arange(7))
+
+    # a budget of a few particle blocks and phase series gives the same averages
+    maxBytes = 2 * 24 * 11 * 100  # blocks of 100 particles over 11 frames
+    _, _, FsSmall = Coords_to_FSQ(
+        fn, type=2, n=[2, 5], stride=2, maxLag=6, maxBytes=maxBytes
+    )
+    assert np.allclose(FsSmall, Fs, rtol=1e-12, atol=1e-15)
+
+    # the q-vectors of a changing box are not defined
+    L = np.array([[10.0, 10.0, 10.0], [12.0, 12.0, 12.0]])
+    traj = ArrayReader(np.random.default_rng(0).uniform(0, 10, (2, 50, 3)), L)
+    with pytest.raises(ValueError):
+        Coords_to_FSQ(traj, type=1, n=2)
+
+    # average over every time origin and direction by hand
+    with nc.Dataset(fn) as ds:
+        X = []
+        for frame in range(0, 21, 2):  # match the atoms of every frame by identifier
+            order = np.argsort(ds["identifier"][frame])
+            mask = ds["atom_types"][frame][order] == 2
+            X.append(ds["coordinates"][frame][order][mask])
+        X = np.array(X)
+        L = np.asarray(ds["cell_lengths"][0])
+
+    lattice = generateHalfSpace(6)
+    shell = np.rint(np.linalg.norm(lattice, axis=1))
+    for k, n in enumerate([2, 5]):
+        q = 2 * np.pi * lattice[shell == n] / L
+        assert np.isclose(qmag[k], np.linalg.norm(q, axis=1).mean())
+        for lag in range(7):
+            origins = [
+                np.cos((X[t0 + lag] - X[t0]) @ q.T).mean()
+                for t0 in range(X.shape[0] - lag)
+            ]
+            assert np.isclose(Fs[k, lag], np.mean(origins))
+
+
+def test_Coords_to_FQT():
+    """Test the multiple origin collective intermediate scattering, F(q, t).
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+
+    x, qmag, Fqt = Coords_to_FQT(
+        fn, type=2, n=[3, 7], stride=2, maxLag=5, maxDirections=20
+    )  # call function
+
+    assert Fqt.shape == (2, 6)
+    assert np.allclose(x, 20 * np.arange(6))
+
+    # collective densities of every frame and origin average by hand
+    with nc.Dataset(fn) as ds:
+        ds.set_auto_mask(False)
+        L = np.asarray(ds["cell_lengths"][0])
+        X = [ds["coordinates"][f][ds["atom_types"][f] == 2] for f in range(0, 21, 2)]
+    directions = shellDirections([3, 7], maxDirections=20)
+    for k, n in enumerate(directions):
+        q = 2 * np.pi * n / L
+        assert np.isclose(qmag[k], np.linalg.norm(q, axis=1).mean())
+        rho = np.array([np.exp(-1j * Xf @ q.T).sum(axis=0) for Xf in X])
+        for lag in range(6):
+            corr = (rho[lag:] * np.conj(rho[: rho.shape[0] - lag])).real
+            assert np.isclose(Fqt[k, lag], corr.mean() / X[0].shape[0])
+
+    # the q-vectors of a changing box are not defined
+    L = np.array([[10.0, 10.0, 10.0], [12.0, 12.0, 12.0]])
+    traj = ArrayReader(np.random.default_rng(0).uniform(0, 10, (2, 50, 3)), L)
+    with pytest.raises(ValueError):
+        Coords_to_FQT(traj, type=1, n=2)
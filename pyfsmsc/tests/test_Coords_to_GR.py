@@ -5,6 +5,8 @@ import pytest
 import netCDF4 as nc
 import scipy.interpolate as interp
 from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR_frames
+from pyfsmsc.helpfunctions.readers import ArrayReader
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
@@ -64,3 +66,43 @@ def test_Coords_to_GR():
     R2 = sklearn.metrics.r2_score(new_y1, gAll)
 
     assert R2 > 0.90
+
+
+def test_Coords_to_GR_frames():
+    """Test the single pass time average of the real space structure, G(r).
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read netCDF4 data
+
+    rCut = 5
+    nHis = 80
+
+    # time average the data frame by frame
+    gFrame = [Coords_to_GR(fn, rCut, nHis, frame)[1] for frame in range(6)]
+
+    re, gAll, gFrames = Coords_to_GR_frames(fn, rCut, nHis, 0, 6, perFrame=True)
+
+    assert gFrames.shape == (6, nHis)
+    assert np.allclose(gFrames, gFrame)
+    assert np.allclose(gAll, np.mean(gFrame, axis=0))
+
+    # strided frames pick up every other frame
+    re, gStride = Coords_to_GR_frames(fn, rCut, nHis, 0, 6, stride=2)
+
+    assert np.allclose(gStride, np.mean(gFrame[::2], axis=0))
+
+    # every frame is normalized by its own box
+    rng = np.random.default_rng(0)
+    L = np.array([[10.0, 10.0, 10.0], [12.0, 12.0, 12.0]])
+    traj = ArrayReader(rng.uniform(0, 10, (2, 500, 3)), L)
+    re, gBox = Coords_to_GR(traj, 4.0, 40, 1)
+    re, gFrames = Coords_to_GR_frames(traj, 4.0, 40, 1, 2)
+
+    assert np.allclose(gBox, gFrames)
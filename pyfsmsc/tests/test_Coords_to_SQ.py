@@ -4,6 +4,7 @@ import pyfsmsc
 import pytest
 import netCDF4 as nc
 from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ
+from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ_frames
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
@@ -42,3 +43,28 @@ def test_Coords_to_SQ():
 
     # pass test if the control and method are within a small tolerance
     assert np.max(b - data.to_numpy()) < 10 ** (-3)
+
+
+def test_Coords_to_SQ_frames():
+    """Test the single pass time average of reciprocal space structure, S(q).
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+
+    # time average the data frame by frame
+    Sq = np.array(
+        [Coords_to_SQ(fn, type=2, nmax=6, frame=frame)[1] for frame in range(0, 21, 4)]
+    )
+
+    q, SqMean, SqVar = Coords_to_SQ_frames(fn, type=2, nmax=6, stride=4)
+
+    assert np.array_equal(q, Coords_to_SQ(fn, type=2, nmax=6, frame=0)[0])
+    assert np.allclose(SqMean, Sq.mean(axis=0))
+    assert np.allclose(SqVar, Sq.var(axis=0, ddof=1))
@@ -0,0 +1,44 @@
+"""Tests the particle-mesh coordinates to SQ utility."""
+
+import pyfsmsc
+import pytest
+import netCDF4 as nc
+from pyfsmsc.reciprocalspace.meshSQ import Coords_to_SQ_mesh
+from pyfsmsc.reciprocalspace.Coords_to_SQ import densityModes
+import numpy as np
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def test_Coords_to_SQ_mesh():
+    """Test the particle-mesh structure factor against the direct sum, S(q).
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+    qmax = 8
+
+    q, Sq, n = Coords_to_SQ_mesh(fn, type=1, qmax=qmax, frame=0)  # call function
+
+    # direct sum over the same lattice vectors
+    with nc.Dataset(fn) as ds:
+        X = np.asarray(ds["coordinates"][0][ds["atom_types"][0] == 1])
+        L = np.asarray(ds["cell_lengths"][0])
+    rho = densityModes(n, L, X, 1)
+    SqDirect = np.abs(rho) ** 2 / X.shape[0]
+
+    # q = 0 and Friedel copies are left out
+    assert np.all(q[:, 0] > 0) and np.all(q[:, 0] <= qmax)
+    assert np.unique(np.concatenate((n, -n)), axis=0).shape[0] == 2 * n.shape[0]
+
+    # pass test if the mesh matches the stated tolerances
+    err = np.abs(Sq[:, 0] - SqDirect)
+    assert np.max(err[q[:, 0] <= qmax / 2]) < 5 * 10 ** (-3)
+    assert np.max(err) < 5 * 10 ** (-2)
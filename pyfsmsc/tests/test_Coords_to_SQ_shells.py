@@ -0,0 +1,51 @@
+"""Tests the shell averaged coordinates to SQ utility."""
+
+import pyfsmsc
+import pytest
+from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ
+from pyfsmsc.reciprocalspace.qShells import Coords_to_SQ_shells
+from pyfsmsc.reciprocalspace.qShells import qShells
+import numpy as np
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def test_Coords_to_SQ_shells():
+    """Test averaging of reciprocal space structure, S(q), over q-shells.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+    binWidth = 0.25
+
+    q, Sq = Coords_to_SQ(fn, type=1, nmax=10, frame=0)
+    q = q[1:, 0]  # leave out q = 0
+    Sq = Sq[1:, 0]
+
+    qShell, SqShell, counts, stderr = Coords_to_SQ_shells(
+        fn, type=1, nmax=10, frame=0, binWidth=binWidth
+    )  # call function
+
+    # sort and bin the raw data by hand
+    shell = (q / binWidth).astype(int)
+    for k, item in enumerate(np.unique(shell)):
+        inShell = Sq[shell == item]
+        assert counts[k] == inShell.shape[0]
+        assert np.isclose(SqShell[k], inShell.mean())
+        if inShell.shape[0] > 1:
+            assert np.isclose(stderr[k], inShell.std(ddof=1) / inShell.shape[0] ** 0.5)
+
+    # subsampling caps the shells and repeats for the same box
+    n1, shell1, qShell1, counts1 = qShells(10, [10, 10, 10], binWidth, 20, seed=1)
+    n2, shell2, qShell2, counts2 = qShells(10, [10, 10, 10], binWidth, 20, seed=1)
+
+    assert n1 is n2
+    assert np.max(counts1) == 20
+    assert np.array_equal(counts1, np.minimum(counts, 20))
@@ -0,0 +1,51 @@
+"""Tests the coordinates to partial GR utility."""
+
+import pyfsmsc
+import pytest
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_partialGR
+import numpy as np
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def test_Coords_to_partialGR():
+    """Test conversion of coordinates to partial real space structures, g_ab(r).
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read netCDF4 data
+
+    rCut = 4
+    nHis = 40
+    frame = 2
+
+    re, types, gab = Coords_to_partialGR(fn, rCut, nHis, frame)  # call function
+
+    assert np.array_equal(types, [1, 2])
+    assert gab.shape == (2, 2, nHis)
+    assert np.array_equal(gab[0, 1], gab[1, 0])
+
+    # the like partial of type 1 is the single species radial distribution
+    reSingle, gSingle = Coords_to_GR(fn, rCut, nHis, frame)
+    assert np.array_equal(gab[0, 0], gSingle)
+
+    # both pair searches bin the same pairs
+    re, types, gabTiles = Coords_to_partialGR(
+        fn, rCut, nHis, frame, method="tiles", blockSize=999
+    )
+    assert np.array_equal(gab, gabTiles)
+
+    # the partials approach the ideal gas at the cutoff
+    assert np.all(np.abs(gab[:, :, -10:].mean(axis=2) - 1) < 0.05)
+
+    # types without atoms in the frame have no partials
+    with pytest.raises(ValueError):
+        Coords_to_partialGR(fn, rCut, nHis, frame, types=[2, 9])
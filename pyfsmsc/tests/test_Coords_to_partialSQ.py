@@ -0,0 +1,56 @@
+"""Tests the coordinates to partial SQ utility."""
+
+import pyfsmsc
+import pytest
+import netCDF4 as nc
+from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ
+from pyfsmsc.reciprocalspace.Coords_to_SQ import densityModes, generateIndices
+from pyfsmsc.reciprocalspace.partialSQ import Coords_to_partialSQ
+import numpy as np
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def test_Coords_to_partialSQ():
+    """Test conversion of coordinates to partial reciprocal space structures, S_ab(q).
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+    nmax = 6
+
+    q, types, Sab, Sw = Coords_to_partialSQ(
+        fn, nmax=nmax, frame=0, scatteringLengths=[1, 1]
+    )  # call function
+
+    assert np.array_equal(types, [1, 2])
+    assert np.allclose(Sab[0, 1], Sab[1, 0])
+
+    # like partials are the single species structure factors
+    qSingle, SqSingle = Coords_to_SQ(fn, type=2, nmax=nmax, frame=0)
+    assert np.array_equal(q, qSingle)
+    assert np.allclose(Sab[1, 1], SqSingle[:, 0])
+
+    # equal scattering lengths give the structure factor of every atom
+    with nc.Dataset(fn) as ds:
+        X = np.asarray(ds["coordinates"][0])
+        L = np.asarray(ds["cell_lengths"][0])
+    rho = densityModes(generateIndices(nmax), L, X, 1)
+    assert np.allclose(Sw[:, 0], np.abs(rho) ** 2 / X.shape[0])
+
+    # Faber-Ziman partials follow from the Ashcroft-Langreth partials
+    q, types, SabFZ = Coords_to_partialSQ(fn, nmax=nmax, frame=0, convention="FZ")
+    c = np.array([4950, 550]) / 5500
+    assert np.allclose(SabFZ[0, 1], 1 + Sab[0, 1] / np.sqrt(c[0] * c[1]))
+    assert np.allclose(SabFZ[1, 1], 1 + (Sab[1, 1] - 1) / c[1])
+
+    # types without atoms in the frame have no partials
+    with pytest.raises(ValueError):
+        Coords_to_partialSQ(fn, nmax=nmax, frame=0, types=[2, 9])
@@ -0,0 +1,104 @@
+"""Tests merging and saving the partial results of trajectory analyses."""
+
+import os
+import tempfile
+import pyfsmsc
+import pytest
+import netCDF4 as nc
+from pyfsmsc.helpfunctions.readers import ArrayReader
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR_frames, PairCountAccumulator
+from pyfsmsc.realspace.Coords_to_GR import pairCountFrames
+from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ_frames
+from pyfsmsc.reciprocalspace.Coords_to_SQ import ScatteringAccumulator
+from pyfsmsc.reciprocalspace.Coords_to_SQ import scatteringFrames, generateIndices
+from pyfsmsc.reciprocalspace.qShells import qShells
+from pyfsmsc.reciprocalspace.dynamics import Coords_to_dynamics
+from pyfsmsc.reciprocalspace.dynamics import SelfScatteringAccumulator
+import numpy as np
+
+
+def test_accumulators():
+    """Test accumulators of two parts of a trajectory against the whole.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+    with nc.Dataset(fn) as ds:
+        ds.set_auto_mask(False)
+        L = ds["cell_lengths"][0]
+        X = [ds["coordinates"][f][ds["atom_types"][f] == 2] for f in range(6)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first, _ = pairCountFrames(fn, range(0, 5), 4.0, 50)  # call function
+        second, _ = pairCountFrames(fn, range(5, 9), 4.0, 50)
+        second.save(os.path.join(tmp, "gr.npz"))
+        first.merge(PairCountAccumulator.load(os.path.join(tmp, "gr.npz")))
+        assert first.nFrames == 9
+        expected = Coords_to_GR_frames(fn, 4.0, 50, stop=9)
+        for a, b in zip(first.finalize(), expected):
+            assert np.allclose(a, b, rtol=1e-12, atol=0)
+
+        with pytest.raises(ValueError):
+            first.merge(PairCountAccumulator(4.0, 40))
+        with pytest.raises(ValueError):
+            PairCountAccumulator(4.0, 50).finalize()  # no frames
+
+        # scattering data of every vector and averaged over q-shells
+        n = generateIndices(4)
+        first = scatteringFrames(fn, range(0, 4), 1, n)
+        first.merge(scatteringFrames(fn, range(4, 9), 1, n))
+        expected = Coords_to_SQ_frames(fn, 1, 4, stop=9)
+        for a, b in zip(first.finalize(), expected):
+            assert np.allclose(a, b, rtol=1e-12, atol=1e-15)
+
+        n, shell, qShell, counts = qShells(6, L, 0.5)
+        first = ScatteringAccumulator(n, shell)
+        second = ScatteringAccumulator(n, shell)
+        for frame in range(6):
+            (first if frame < 2 else second).update(X[frame], L)
+        second.save(os.path.join(tmp, "sq.npz"))
+        first.merge(ScatteringAccumulator.load(os.path.join(tmp, "sq.npz")))
+        q, Sq, SqVar = first.finalize()
+        assert np.allclose(q[:, 0], qShell)
+        assert Sq.shape == (counts.shape[0], 1)
+
+        # parts of a trajectory with a changing box merge
+        first = ScatteringAccumulator(n, shell)
+        second = ScatteringAccumulator(n, shell)
+        first.update(X[0], L)
+        second.update(X[1], 1.25 * L)
+        qChanging = first.merge(second).finalize()[0]
+        assert np.allclose(qChanging, q * (1 + 1 / 1.25) / 2)
+        with pytest.raises(ValueError):
+            ScatteringAccumulator(n, shell).finalize()  # no frames
+
+        # self intermediate scattering of time origins before and after frame 10
+        whole = SelfScatteringAccumulator([3, 5])
+        Coords_to_dynamics(fn, 2, [whole], maxLag=4)
+        first = SelfScatteringAccumulator([3, 5])
+        second = SelfScatteringAccumulator([3, 5])
+        Coords_to_dynamics(fn, 2, [first], stop=14, maxLag=4, originStop=10)
+        Coords_to_dynamics(fn, 2, [second], start=10, maxLag=4)
+        second.save(os.path.join(tmp, "fs.npz"))
+        first.merge(SelfScatteringAccumulator.load(os.path.join(tmp, "fs.npz")))
+        assert np.array_equal(first.counts, whole.counts)
+        for a, b in zip(first.finalize(), whole.finalize()):
+            assert np.allclose(a, b, rtol=1e-10, atol=1e-12)
+
+        # parts of a trajectory with a changing box merge
+        traj = ArrayReader(np.array(X), L * (1 + 0.01 * np.arange(6))[:, None])
+        whole = SelfScatteringAccumulator([3, 5])
+        Coords_to_dynamics(traj, 1, [whole], maxLag=2)
+        first = SelfScatteringAccumulator([3, 5])
+        second = SelfScatteringAccumulator([3, 5])
+        Coords_to_dynamics(traj, 1, [first], stop=5, maxLag=2, originStop=3)
+        Coords_to_dynamics(traj, 1, [second], start=3, maxLag=2)
+        first.merge(second)
+        for a, b in zip(first.finalize(), whole.finalize()):
+            assert np.allclose(a, b, rtol=1e-10, atol=1e-12)
@@ -0,0 +1,56 @@
+"""Tests the linked-cell neighbor search for the radial distribution."""
+
+import pyfsmsc
+import pytest
+import numpy as np
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR, pairCounts
+from pyfsmsc.realspace.cellList import buildCellList
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def test_cellList():
+    """Test that the linked-cell search reproduces the direct particle loop.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read netCDF4 data
+
+    # compare a cutoff with many cells and one with fewer than three per side
+    for rCut, nHis in [(2.5, 50), (4.5, 45)]:
+        reLoop, gLoop = Coords_to_GR(fn, rCut, nHis, 0, method="loop")
+        reCell, gCell = Coords_to_GR(fn, rCut, nHis, 0, method="cells")
+
+        assert np.array_equal(reLoop, reCell)
+        assert np.array_equal(gLoop, gCell)
+
+    # private thread histograms reduce to the same result
+    for nThreads in [1, 2, 4]:
+        reCell, gCell = Coords_to_GR(fn, 4.5, 45, 0, nThreads=nThreads)
+        assert np.array_equal(gLoop, gCell)
+
+    # every particle lands in exactly one cell
+    X = np.random.default_rng(0).uniform(-1, 11, (500, 3))
+    Xs, order, cellStart, ncell = buildCellList(X, np.array([10.0, 10.0, 10.0]), 2.5)
+
+    assert np.array_equal(ncell, [4, 4, 4])
+    assert cellStart[-1] == X.shape[0]
+    assert np.array_equal(Xs, X[order])
+
+    # a dilute box has no more cells than particles
+    rng = np.random.default_rng(1)
+    L = np.array([200.0, 200.0, 200.0])
+    X = rng.uniform(0, 200, (1000, 3))
+    Xs, order, cellStart, ncell = buildCellList(X, L, 0.5)
+    assert np.prod(ncell) <= X.shape[0]
+    for rCut in [0.5, 8.0]:
+        reLoop, histLoop = pairCounts(X, L, rCut, 10, method="loop")
+        reCell, histCell = pairCounts(X, L, rCut, 10, method="cells")
+        assert np.array_equal(histLoop, histCell)
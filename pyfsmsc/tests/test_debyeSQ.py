@@ -0,0 +1,55 @@
+"""Tests the Debye formula scattering utility."""
+
+import pyfsmsc
+import pytest
+import numpy as np
+import pandas as pd
+from pyfsmsc.reciprocalspace.debyeSQ import debyeSQ
+from pyfsmsc.reciprocalspace.debyeSQ import Microstructures_to_SQ
+
+
+def test_debyeSQ():
+    """Test the histogrammed Debye formula against the sum over every pair.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    X = np.random.default_rng(0).normal(size=(400, 3)) * 3  # isolated cluster
+    q = np.linspace(0.05, 10, 200)
+
+    # Debye formula summed over every pair
+    Rij = np.linalg.norm(X[:, None] - X[None, :], axis=2)[np.triu_indices(400, 1)]
+    control = 1 + 2 / 400 * np.sinc(np.outer(q, Rij) / np.pi).sum(axis=1)
+
+    Sq = debyeSQ(X, q, binWidth=0.001)  # call function
+
+    assert np.max(np.abs(Sq - control)) < 10 ** (-3)
+
+    # every microstructure gets its own scattering curve
+    df = pd.DataFrame(
+        {
+            "clusterID": np.repeat([3, 7], 200),
+            "atomCoordx": X[:, 0],
+            "atomCoordy": X[:, 1],
+            "atomCoordz": X[:, 2],
+        }
+    )
+    clusterIDs, SqClusters = Microstructures_to_SQ(df, q)
+
+    assert np.array_equal(clusterIDs, [3, 7])
+    assert np.allclose(SqClusters[1], debyeSQ(X[200:], q))
+
+    # microstructures crossing the periodic boundary are unwrapped
+    L = np.array([60.0, 60.0, 60.0])
+    Xw = np.mod(X, L)  # both clusters sit across the corner of the box
+    df[["atomCoordx", "atomCoordy", "atomCoordz"]] = Xw
+    df = df.sample(frac=1, random_state=0)  # clusters interleaved in the rows
+    clusterIDs, SqClusters = Microstructures_to_SQ(df, q, L=L)
+
+    assert np.allclose(SqClusters[0], debyeSQ(X[:200], q))
+    assert np.allclose(SqClusters[1], debyeSQ(X[200:], q))
@@ -0,0 +1,90 @@
+"""Tests the single pass dynamics pipeline."""
+
+import pyfsmsc
+import pytest
+import netCDF4 as nc
+from pyfsmsc.reciprocalspace.Coords_to_FSQ import Coords_to_FSQ, shellDirections
+from pyfsmsc.helpfunctions.readers import ArrayReader
+from pyfsmsc.reciprocalspace.dynamics import Coords_to_dynamics
+from pyfsmsc.reciprocalspace.dynamics import DisplacementAccumulator
+from pyfsmsc.reciprocalspace.dynamics import MSDAccumulator, NonGaussianAccumulator
+from pyfsmsc.reciprocalspace.dynamics import SelfScatteringAccumulator
+from pyfsmsc.reciprocalspace.dynamics import VanHoveAccumulator
+import numpy as np
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def test_Coords_to_dynamics():
+    """Test MSD, alpha_2, Fs(q, t) and Gs(r, t) from one trajectory pass.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+
+    accumulators = [
+        MSDAccumulator(),
+        NonGaussianAccumulator(),
+        SelfScatteringAccumulator([2, 5]),
+        VanHoveAccumulator(20.0, 40),
+    ]
+    x, results = Coords_to_dynamics(
+        fn, 2, accumulators, stride=2, maxLag=6
+    )  # call function
+    msd, alpha2, (qmag, Fs), (re, Gs) = results
+
+    # self scattering matches the FFT multiple origin average
+    x0, qmag0, Fs0 = Coords_to_FSQ(fn, type=2, n=[2, 5], stride=2, maxLag=6)
+    assert np.allclose(x, x0)
+    assert np.allclose(qmag, qmag0)
+    assert np.allclose(Fs, Fs0)
+
+    # unwrapped displacements of every time origin by hand
+    with nc.Dataset(fn) as ds:
+        ds.set_auto_mask(False)
+        X = []
+        for frame in range(0, 21, 2):  # match the atoms of every frame by identifier
+            order = np.argsort(ds["identifier"][frame])
+            mask = ds["atom_types"][frame][order] == 2
+            X.append(ds["coordinates"][frame][order][mask])
+        X = np.array(X)
+        L = np.asarray(ds["cell_lengths"][0])
+    step = np.diff(X, axis=0)
+    step -= L * np.rint(step / L)
+    U = np.concatenate((X[:1], X[0] + np.cumsum(step, axis=0)))
+
+    for lag in range(7):
+        r2 = np.concatenate(
+            [((U[t0 + lag] - U[t0]) ** 2).sum(axis=1) for t0 in range(U.shape[0] - lag)]
+        )
+        assert np.isclose(msd[lag], r2.mean())
+        if lag > 0:
+            assert np.isclose(
+                alpha2[lag], 3 * np.mean(r2**2) / (5 * r2.mean() ** 2) - 1
+            )
+        hist = np.histogram(np.sqrt(r2), bins=40, range=(0, 20))[0]
+        shellVolume = 4 / 3 * np.pi * np.diff(np.linspace(0, 20, 41) ** 3)
+        assert np.allclose(Gs[lag], hist / r2.shape[0] / shellVolume)
+
+    # the scattering vectors follow a changing box
+    X = np.tile(np.arange(12.0).reshape(4, 3), (3, 1, 1))
+    traj = ArrayReader(X, [[10.0] * 3, [11.0] * 3, [12.0] * 3])
+    x, [(qmag, Fs)] = Coords_to_dynamics(
+        traj, 1, [SelfScatteringAccumulator(1)], maxLag=1
+    )
+    nmag = np.linalg.norm(shellDirections(1)[0], axis=1).mean()
+    assert np.allclose(qmag, 2 * np.pi * nmag * (1 / 10 + 2 / 11 + 2 / 12) / 5)
+    assert np.allclose(Fs, 1)
+
+    with pytest.raises(TypeError):
+        DisplacementAccumulator()
+    for n in [0, [2, 0]]:  # magnitudes without lattice directions
+        with pytest.raises(ValueError):
+            SelfScatteringAccumulator(n)
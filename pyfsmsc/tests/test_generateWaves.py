@@ -0,0 +1,63 @@
+"""Tests the scattering vector generators."""
+
+import pyfsmsc
+import pytest
+import netCDF4 as nc
+import numpy as np
+from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ
+from pyfsmsc.reciprocalspace.Coords_to_SQ import generateWaves
+from pyfsmsc.reciprocalspace.Coords_to_SQ import generateHalfSpace
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def test_generateWaves():
+    """Test the octant and half-space scattering vectors.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    nmax = 5
+    L = np.array([10.0, 11.0, 12.0])
+
+    # octant in the order of the nested loops
+    loop = [
+        [nx, ny, nz] for nx in range(nmax) for ny in range(nmax) for nz in range(nmax)
+    ]
+    assert np.array_equal(generateWaves(nmax, L), 2 * np.pi * np.array(loop) / L)
+
+    # every nonzero index of the sphere appears once as either n or -n
+    n = generateHalfSpace(nmax)
+    sphere = np.array(
+        [
+            [nx, ny, nz]
+            for nx in range(-nmax, nmax + 1)
+            for ny in range(-nmax, nmax + 1)
+            for nz in range(-nmax, nmax + 1)
+            if 0 < nx**2 + ny**2 + nz**2 <= nmax**2
+        ]
+    )
+    both = np.unique(np.concatenate((n, -n)), axis=0)
+    assert 2 * n.shape[0] == sphere.shape[0]
+    assert np.array_equal(both, np.unique(sphere, axis=0))
+
+    # half-space vectors give the same structure factor as their mirror images
+    fn = "examples/colloids/colloidNC"  # read data
+    q, Sq = Coords_to_SQ(fn, type=2, nmax=4, frame=0, waves="halfspace")
+    assert q.shape[0] == generateHalfSpace(4).shape[0]
+    assert np.all(q > 0)
+
+    ds = nc.Dataset(fn)
+    ds.set_auto_mask(False)
+    X = ds["coordinates"][0][ds["atom_types"][0] == 2]
+    L = np.asarray(ds["cell_lengths"][0])
+    ds.close()
+    for mirror in [1, -1]:  # S(q) and S(-q) by hand
+        rho = np.exp(-1j * X @ (2 * np.pi * mirror * generateHalfSpace(4) / L).T)
+        assert np.allclose(Sq[:, 0], np.abs(rho.sum(axis=0)) ** 2 / X.shape[0])
@@ -0,0 +1,38 @@
+"""Tests the tiled pair histogram for the radial distribution."""
+
+import pyfsmsc
+import pytest
+import numpy as np
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR
+from pyfsmsc.realspace.pairTiles import tiledHistogram
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def test_pairTiles():
+    """Test that unique pair tiles reproduce the direct particle loop.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read netCDF4 data
+
+    reLoop, gLoop = Coords_to_GR(fn, 3, 60, 1, method="loop")
+    reTile, gTile = Coords_to_GR(fn, 3, 60, 1, method="tiles", blockSize=700)
+
+    assert np.array_equal(reLoop, reTile)
+    assert np.array_equal(gLoop, gTile)
+
+    # the number of pairs does not depend on the tile size
+    X = np.random.default_rng(0).uniform(0, 10, (300, 3))
+    L = np.array([10.0, 10.0, 10.0])
+    edges = np.linspace(0, 20, 11)  # every pair falls inside the cutoff
+    for blockSize in [1, 7, 300, 1000]:
+        hist = tiledHistogram(X, L, edges, blockSize)
+        assert hist.sum() == 300 * 299 // 2
@@ -0,0 +1,94 @@
+"""Tests the process pool driver of trajectory averages."""
+
+import pyfsmsc
+import pytest
+from pyfsmsc.helpfunctions.parallel import parallelFrames
+from pyfsmsc.helpfunctions.trajectory import Trajectory
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR_frames
+from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ_frames
+import numpy as np
+
+
+def test_parallelFrames():
+    """Test averages over worker processes against the serial pass.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+
+    expected = Coords_to_GR_frames(fn, 4.0, 50, stop=9, perFrame=True)
+    for nWorkers, chunkSize in [(2, None), (1, 2)]:
+        result = Coords_to_GR_frames(
+            fn, 4.0, 50, stop=9, perFrame=True, nWorkers=nWorkers, chunkSize=chunkSize
+        )  # call function
+        for a, b in zip(result, expected):
+            assert np.allclose(a, b, rtol=1e-12, atol=0)
+
+    # chunks run in worker processes, or in the calling process with
+    # nWorkers=1, merge the same way
+    expected = Coords_to_SQ_frames(fn, 1, 4, stop=9)
+    for nWorkers, chunkSize in [(2, None), (1, 4)]:
+        result = Coords_to_SQ_frames(
+            fn, 1, 4, stop=9, nWorkers=nWorkers, chunkSize=chunkSize
+        )
+        for a, b in zip(result, expected):
+            assert np.allclose(a, b, rtol=1e-12, atol=1e-15)
+
+    with pytest.raises(ValueError):
+        Coords_to_GR_frames(fn, 4.0, 50, start=5, stop=5)
+
+    # worker processes reopen an open trajectory with its options
+    with Trajectory(fn, slabSize=3, cache=False) as traj:
+        options = parallelFrames(readerOptions, traj, range(4), (), 2)
+    assert options == [traj.options, traj.options]
+    assert options[0]["cache"] is False
+
+    # chunks of consecutive frames come back in frame order
+    assert parallelFrames(chunkFrames, fn, range(1, 20, 2), (), 1, 3) == [
+        [1, 3, 5],
+        [7, 9, 11],
+        [13, 15, 17],
+        [19],
+    ]
+
+
+def chunkFrames(fn, frames):
+    """List the frames of a chunk.
+
+    Parameters
+    ----------
+    fn : str
+        Path to the trajectory.
+    frames : range
+        Frames of the chunk.
+
+    Returns
+    -------
+    frames : list
+        Frames of the chunk.
+    """
+    return list(frames)
+
+
+def readerOptions(traj, frames):
+    """Report the options of the reader of a chunk.
+
+    Parameters
+    ----------
+    traj : FrameReader
+        Reader of the trajectory.
+    frames : range
+        Frames of the chunk.
+
+    Returns
+    -------
+    options : dict
+        Keyword arguments the reader was opened with.
+    """
+    return traj.options
@@ -0,0 +1,142 @@
+"""Tests the in-memory and LAMMPS dump trajectory readers."""
+
+import os
+import tempfile
+from unittest import mock
+import pyfsmsc
+import pytest
+import netCDF4 as nc
+from pyfsmsc.helpfunctions.readers import ArrayReader, FrameReader, LammpsDumpReader
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR_frames
+from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ_frames
+import numpy as np
+
+
+def test_ArrayReader():
+    """Test analyses reading frames from memory without copies.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+    with nc.Dataset(fn) as ds:
+        ds.set_auto_mask(False)
+        X = ds["coordinates"][:6]
+        types = ds["atom_types"][:6]
+        ids = ds["identifier"][:6]
+        L = ds["cell_lengths"][:6]
+
+    traj = ArrayReader(X, L[0], types, ids)
+    assert len(traj) == 6 and not traj.staticTypes
+    assert np.shares_memory(traj.coordinates(4), X)  # zero copy
+    assert np.array_equal(traj.positions(4, 2), X[4][types[4] == 2])
+
+    result = Coords_to_SQ_frames(traj, 1, 4, stride=2)  # call function
+    expected = Coords_to_SQ_frames(fn, 1, 4, stop=6, stride=2)
+    for a, b in zip(result, expected):
+        assert np.array_equal(a, b)
+
+    # a single frame of static atom types
+    traj = ArrayReader(X[2], L[2], types[2])
+    assert len(traj) == 1 and traj.staticTypes
+    assert np.array_equal(traj.positions(0, 1), X[2][types[2] == 1])
+
+    with pytest.raises(TypeError):
+        FrameReader(1, 1)  # backends implement the reading
+
+
+def test_LammpsDumpReader():
+    """Test analyses reading a LAMMPS dump frame by frame.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+    with nc.Dataset(fn) as ds:
+        ds.set_auto_mask(False)
+        X = ds["coordinates"][:6]
+        types = ds["atom_types"][:6]
+        ids = ds["identifier"][:6]
+        cellLengths = ds["cell_lengths"][:6]
+        steps = ds["Timestep"][:6]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "colloid.dump")
+        with open(dump, "w") as f:  # scaled coordinates and a string column
+            for frame in range(6):
+                L = cellLengths[frame]
+                f.write("ITEM: TIMESTEP\n%d\n" % steps[frame])
+                f.write("ITEM: NUMBER OF ATOMS\n%d\n" % X.shape[1])
+                f.write("ITEM: BOX BOUNDS pp pp pp\n")
+                f.write("".join("0 %.17g\n" % length for length in L))
+                f.write("ITEM: ATOMS id element type xs ys zs\n")
+                for i, t, x in zip(ids[frame], types[frame], X[frame] / L):
+                    f.write("%d C %d %.17g %.17g %.17g\n" % (i, t, *x))
+
+        with LammpsDumpReader(dump, timestep=0.5) as traj:  # call function
+            assert len(traj) == 6
+            assert np.array_equal(traj.time, 0.5 * steps)
+            assert np.array_equal(traj.atomVariable("identifier", 3), ids[3])
+            assert np.allclose(traj.coordinates(3), X[3])
+            result = Coords_to_GR_frames(traj, 4.0, 50, stride=2)
+
+        # every frame of a slab is parsed once for all of its variables
+        with LammpsDumpReader(dump, slabSize=4) as traj:
+            with mock.patch("numpy.loadtxt", wraps=np.loadtxt) as loadtxt:
+                read = list(traj.iterFrames(traj.frames(), 2, ordered=True))
+            assert loadtxt.call_count == 6
+            for frame, X2 in read:
+                order = np.argsort(ids[frame])
+                assert np.allclose(X2, X[frame][order][types[frame][order] == 2])
+
+        expected = Coords_to_GR_frames(fn, 4.0, 50, stop=6, stride=2)
+        for a, b in zip(result, expected):
+            assert np.allclose(a, b)
+
+        result = Coords_to_GR_frames(dump, 4.0, 50, stride=2)  # detected by path
+        for a, b in zip(result, expected):
+            assert np.allclose(a, b)
+
+        noTypes = os.path.join(tmp, "noTypes.dump")
+        with open(noTypes, "w") as f:  # atoms default to type 1
+            for frame in range(2):
+                f.write("ITEM: TIMESTEP\n%d\n" % steps[frame])
+                f.write("ITEM: NUMBER OF ATOMS\n%d\n" % X.shape[1])
+                f.write("ITEM: BOX BOUNDS pp pp pp\n")
+                f.write("".join("0 %.17g\n" % length for length in cellLengths[frame]))
+                f.write("ITEM: ATOMS id x y z\n")
+                for i, x in zip(ids[frame], X[frame]):
+                    f.write("%d %.17g %.17g %.17g\n" % (i, *x))
+        with LammpsDumpReader(noTypes) as traj:
+            assert traj.hasVariable("atom_types")
+            assert np.array_equal(
+                traj.atomVariable("atom_types", 1), np.ones(X.shape[1])
+            )
+            assert np.allclose(traj.positions(1, 1), X[1])
+            result = Coords_to_GR_frames(traj, 4.0, 50)
+        array = ArrayReader(X[:2], cellLengths[:2], identifiers=ids[:2])
+        for a, b in zip(result, Coords_to_GR_frames(array, 4.0, 50)):
+            assert np.allclose(a, b)
+
+        with open(dump, "a") as f:
+            f.write("ITEM: TIMESTEP\n0\nITEM: NUMBER OF ATOMS\n1\n")
+            f.write("ITEM: BOX BOUNDS pp pp pp\n0 1\n0 1\n0 1\n")
+            f.write("ITEM: ATOMS id type x y z\n1 1 0 0 0\n")
+        with pytest.raises(ValueError):
+            LammpsDumpReader(dump)
+
+        with open(dump, "w") as f:  # atoms listed before their number
+            f.write("ITEM: TIMESTEP\n0\nITEM: BOX BOUNDS pp pp pp\n0 1\n0 1\n0 1\n")
+            f.write("ITEM: ATOMS id type x y z\n1 1 0 0 0\n")
+        with pytest.raises(ValueError):
+            LammpsDumpReader(dump)
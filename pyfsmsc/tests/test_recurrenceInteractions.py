@@ -0,0 +1,40 @@
+"""Tests the phase recurrence structure factor kernel."""
+
+import pyfsmsc
+import pytest
+import numpy as np
+from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ
+from pyfsmsc.reciprocalspace.Coords_to_SQ import densityModes
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def test_recurrenceInteractions():
+    """Test that phase recurrences reproduce the direct wave sums, S(q).
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+
+    qDirect, SqDirect = Coords_to_SQ(fn, type=2, nmax=8, frame=0, method="direct")
+    q, Sq = Coords_to_SQ(fn, type=2, nmax=8, frame=0)  # call function
+
+    assert np.array_equal(q, qDirect)
+    assert np.max(np.abs(Sq - SqDirect)) < 10 ** (-8)
+
+    # negative indices and thread splits follow exp(i q . r)
+    rng = np.random.default_rng(0)
+    C = rng.uniform(0, 10, (200, 3))
+    L = np.array([10.0, 11.0, 12.0])
+    n = rng.integers(-6, 7, (50, 3))
+    rhoDirect = np.exp(1j * (2 * np.pi * n / L) @ C.T).sum(axis=1)
+    for nThreads in [1, 3]:
+        rho = densityModes(n, L, C, nThreads)
+        assert np.max(np.abs(rho - rhoDirect)) < 10 ** (-8)
@@ -3,6 +3,7 @@
 import pytest
 import pyfsmsc
 import numpy as np
+from pyfsmsc.helpfunctions.readers import ArrayReader
 from pyfsmsc.shapemetrics.shapeMetrics import findMicrostructures
 from pyfsmsc.shapemetrics.shapeMetrics import computeGyTensor
 from pyfsmsc.shapemetrics.shapeMetrics import computeShapeMetrics
@@ -51,3 +52,43 @@ def test_shapeMetrics():
     RgOVITO = RgOVITO.reset_index(drop=True)
     RgUtility = RgUtility.reset_index(drop=True)
     assert np.max(abs(RgOVITO - RgUtility)) < 10 ** (-3)
+
+
+def test_findMicrostructures():
+    """Test cluster sizes and centers of mass of labelled atoms.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    X = np.random.default_rng(0).uniform(0, 10, (8, 3))
+    clst = np.array([0, 3, 3, 5, 0, 3, 7, 5])
+    traj = ArrayReader(
+        X, [10.0] * 3, identifiers=np.arange(10, 18), variables={"c_clst": clst}
+    )
+
+    df, clusterID = findMicrostructures(traj)  # call function
+
+    assert list(df.columns) == [
+        "clusterID",
+        "atomID",
+        "clusterSize",
+        "atomCoordx",
+        "atomCoordy",
+        "atomCoordz",
+        "xcm",
+        "ycm",
+        "zcm",
+    ]
+    inCluster = clst != 0
+    assert np.array_equal(clusterID, clst[inCluster])
+    assert np.array_equal(df["atomID"], np.arange(10, 18)[inCluster])
+    assert np.array_equal(df["clusterSize"], [3, 3, 2, 3, 1, 2])
+    for k, (i, row) in zip(np.flatnonzero(inCluster), df.iterrows()):
+        com = X[clst == clst[k]].mean(axis=0)
+        assert np.allclose(row[["xcm", "ycm", "zcm"]], com)
+        assert np.array_equal(row[["atomCoordx", "atomCoordy", "atomCoordz"]], X[k])
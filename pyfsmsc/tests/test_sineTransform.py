@@ -0,0 +1,124 @@
+"""Tests the precomputed radial Fourier transform."""
+
+import pyfsmsc
+import pytest
+import numpy as np
+import pandas as pd
+from pyfsmsc.helpfunctions.sineTransform import SineTransform, filonWeights
+from pyfsmsc.realspace.rdf2sq import RDF_to_SQ
+
+
+def test_sineTransform():
+    """Test the transform matrix on an analytic curve and on stacks of curves.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    x = np.linspace(0.005, 10, 2000)
+    k = np.linspace(0.5, 8, 50)
+    plan = SineTransform(x, k)  # call function
+
+    # integral of x sin(k x) exp(-x^2) / k over x > 0
+    F = plan.apply(np.exp(-(x**2)))
+    assert np.allclose(F, np.sqrt(np.pi) / 4 * np.exp(-(k**2) / 4), atol=1e-6)
+
+    data = pd.read_csv("examples/colloids/colloidGR", header=None)  # read data
+    r = data.iloc[:, 0].to_numpy()
+    gr = data.iloc[:, 1].to_numpy()
+    density = 5500 / 10**3 * 0.9
+
+    # one plan reused for a stack of curves matches the single curve calls
+    q, Sq = RDF_to_SQ(r, gr, density, 1, 8, 200)
+    plan = SineTransform(r, q)
+    stack = np.vstack((gr, 1 + 0.5 * (gr - 1)))
+    qStack, SqStack = RDF_to_SQ(r, stack, density, 1, 8, 200, plan=plan)
+    assert SqStack.shape == (2, 200)
+    assert np.allclose(qStack, q)
+    assert np.allclose(SqStack[0], Sq)
+    assert np.allclose(SqStack[1], 1 + 0.5 * (Sq - 1))
+
+
+def test_sineTransform_dst():
+    """Test the fast sine transform path against the transform matrix.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    k = np.linspace(0.3, 60, 500)
+    for x0 in [0.5, 1.0, 2.5, 3.0]:  # both transform types with leading zeros
+        x = 0.01 * (x0 + np.arange(2000))
+        f = np.vstack((np.exp(-((x - 3) ** 2)) * np.cos(5 * x), np.exp(-x)))
+        for window in [None, "lorch"]:
+            dense = SineTransform(x, k, method="dense", window=window)
+            fast = SineTransform(x, k, method="dst", window=window)  # call function
+            assert fast.method == "dst"
+            assert np.allclose(fast.apply(f), dense.apply(f), rtol=0, atol=1e-8)
+
+    # grids without a matching sine transform fall back to the matrix
+    x = 0.01 * (0.3 + np.arange(2000))
+    assert SineTransform(x, k, minSize=0).method == "dense"
+    assert SineTransform(0.01 * (0.5 + np.arange(2000)), k, minSize=0).method == "dst"
+    with pytest.raises(ValueError):
+        SineTransform(x, k, method="dst")
+
+    # the Lorch window weights the rectangle rule by sinc(x / x_max)
+    x = 0.01 * (0.5 + np.arange(2000))
+    plan = SineTransform(x, k, method="dense", window="lorch")
+    F = (
+        np.sum(
+            0.01 * x * np.sinc(x / x[-1]) * np.exp(-x) * np.sin(np.outer(k, x)), axis=1
+        )
+        / k
+    )
+    assert np.allclose(plan.apply(np.exp(-x)), F)
+
+
+def test_filonWeights():
+    """Test Filon quadrature on coarse and non-uniform grids.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    # exact integral of a piecewise linear curve through the origin
+    x = np.array([0.3, 0.7, 1.5])
+    g = np.array([1.0, -2.0, 0.5])
+    k = np.array([0.5, 1.25, 2.5, 10.0])  # k h on both sides of the series switch
+    W = filonWeights(x, k)  # call function
+    nodes = np.linspace(0, 1.5, 150001)
+    gLinear = np.interp(nodes, np.concatenate(([0], x)), np.concatenate(([0], g)))
+    for m, km in enumerate(k):
+        integrand = gLinear * np.sin(km * nodes)
+        reference = np.sum(0.5 * (integrand[1:] + integrand[:-1])) * (
+            nodes[1] - nodes[0]
+        )
+        assert np.isclose(W[:, m] @ g, reference, atol=1e-8)
+
+    # coarse bins beyond k dx = pi, where the rectangle rule aliases
+    k = np.linspace(0.5, 60, 300)
+    exact = np.sqrt(np.pi) / 4 * np.exp(-(k**2) / 4)
+    x = 0.2 * (0.5 + np.arange(40))
+    filon = SineTransform(x, k, method="filon").apply(np.exp(-(x**2)))
+    dense = SineTransform(x, k, method="dense").apply(np.exp(-(x**2)))
+    assert np.abs(filon - exact).max() < 2.5e-3
+    assert np.abs(dense - exact).max() > 1e-2
+
+    # non-uniform grids keep the matrix unless the Filon weights are chosen
+    x = np.sort(np.random.default_rng(0).uniform(0, 8, 400))
+    assert SineTransform(x, k, minSize=0).method == "dense"
+    plan = SineTransform(x, k, method="filon")
+    assert np.allclose(plan.apply(np.exp(-(x**2))), exact, atol=1e-3)
@@ -0,0 +1,121 @@
+"""Tests the persistent trajectory handle."""
+
+import os
+import tempfile
+import threading
+import pyfsmsc
+import pytest
+import netCDF4 as nc
+from pyfsmsc.helpfunctions.trajectory import Trajectory, openTrajectory
+from pyfsmsc.helpfunctions.trajectory import prefetchIterator
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR_frames
+import numpy as np
+
+
+def test_Trajectory():
+    """Test frames, cached variables and analyses reading an open trajectory.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+
+    with nc.Dataset(fn) as ds, Trajectory(fn) as traj:  # call function
+        assert len(traj) == 21
+        assert not traj.staticTypes  # atom types are stored for every frame
+
+        X = traj.positions(4, 2)
+        assert type(X) is np.ndarray and X.flags["C_CONTIGUOUS"]
+        assert np.array_equal(X, ds["coordinates"][4][ds["atom_types"][4] == 2])
+        assert traj.typeIndices(4, 2) is traj.typeIndices(4, 2)  # cached
+        assert np.array_equal(traj.cellLengths[4], ds["cell_lengths"][4])
+        assert np.array_equal(traj.time, ds["time"][:])
+
+        # identifier order follows the same atoms through every frame
+        for frame in [0, 7]:
+            ids = ds["identifier"][frame][ds["atom_types"][frame] == 2]
+            idx = traj.typeIndices(frame, 2, ordered=True)
+            assert np.array_equal(
+                traj.atomVariable("identifier", frame)[idx], np.sort(ids)
+            )
+
+        # analyses leave a passed trajectory open for the next one
+        result = Coords_to_GR_frames(traj, 4.0, 50, stop=6, stride=2)
+        with openTrajectory(traj):
+            pass
+        assert traj.ds.isopen()
+
+    assert not traj.ds.isopen()
+    expected = Coords_to_GR_frames(fn, 4.0, 50, stop=6, stride=2)
+    for a, b in zip(result, expected):
+        assert np.array_equal(a, b)
+
+
+def test_iterFrames():
+    """Test frames read ahead in slabs by a background thread.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    fn = "examples/colloids/colloidNC"  # read data
+
+    for prefetch, slabSize in [(0, 4), (1, 1), (3, 8)]:
+        with Trajectory(fn, prefetch=prefetch, slabSize=slabSize) as traj:
+            frames = traj.frames(1, 20, 3)
+            for type, ordered in [(None, False), (2, False), (2, True)]:
+                read = list(traj.iterFrames(frames, type, ordered))  # call function
+                assert [frame for frame, X in read] == list(frames)
+                for frame, X in read:
+                    assert np.array_equal(X, traj.positions(frame, type, ordered))
+
+            for frame, X in traj.iterFrames(frames, 1):
+                break  # the reader thread stops with the loop
+            assert traj.ds.isopen()
+
+    # closing the trajectory stops the reader thread of an unfinished loop
+    threads = threading.active_count()
+    with pytest.raises(RuntimeError):
+        with Trajectory(fn, prefetch=2, slabSize=1) as traj:
+            iterator = traj.iterFrames(traj.frames(), 1)
+            for frame, X in iterator:
+                raise RuntimeError("analysis failed")
+    assert threading.active_count() == threads
+    assert traj._prefetcher is None
+
+    # errors of the reader thread reach the caller
+    def read(item):
+        if item == 3:
+            raise KeyError(item)
+        return item
+
+    with pytest.raises(KeyError):
+        list(prefetchIterator(range(6), read, depth=2))
+
+    # trajectories without times still read ahead
+    with tempfile.TemporaryDirectory() as tmp:
+        fn = os.path.join(tmp, "noTimeNC")
+        ds = nc.Dataset(fn, "w")
+        ds.createDimension("frame", None)
+        ds.createDimension("atom", 10)
+        ds.createDimension("spatial", 3)
+        X = np.random.default_rng(0).uniform(0, 5, (3, 10, 3))
+        ds.createVariable("coordinates", "f8", ("frame", "atom", "spatial"))[:] = X
+        ds.createVariable("atom_types", "i4", ("frame", "atom"))[:] = 1
+        ds.createVariable("cell_lengths", "f8", ("frame", "spatial"))[:] = 5.0
+        ds.close()
+
+        with Trajectory(fn, prefetch=2, cache=False) as traj:
+            read = list(traj.iterFrames(traj.frames(), 1))  # call function
+            assert np.array_equal(read[2][1], X[2])
+        re, g = Coords_to_GR_frames(fn, 2.0, 10)
+        assert g.shape == (10,)
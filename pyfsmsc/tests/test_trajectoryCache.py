@@ -0,0 +1,83 @@
+"""Tests the memory-mapped trajectory cache."""
+
+import os
+import shutil
+import tempfile
+import pyfsmsc
+import pytest
+import netCDF4 as nc
+from pyfsmsc.helpfunctions.trajectory import Trajectory
+from pyfsmsc.helpfunctions.trajectoryCache import CacheDataset, convertTrajectory
+from pyfsmsc.realspace.Coords_to_GR import Coords_to_GR
+from pyfsmsc.reciprocalspace.Coords_to_SQ import Coords_to_SQ_frames
+import numpy as np
+
+
+def test_convertTrajectory():
+    """Test analyses read through the cache and stale caches being ignored.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        fn = os.path.join(tmp, "colloidNC")
+        shutil.copy("examples/colloids/colloidNC", fn)
+        expected = Coords_to_SQ_frames(fn, 1, 4, stop=6, stride=2)
+
+        path = convertTrajectory(fn)  # call function
+        assert os.path.exists(os.path.join(path, "manifest.json"))
+        with Trajectory(fn) as traj:
+            assert isinstance(traj.ds, CacheDataset)
+            assert not traj.staticTypes  # atoms are reordered between frames
+        result = Coords_to_SQ_frames(fn, 1, 4, stop=6, stride=2)
+        for a, b in zip(result, expected):
+            assert np.array_equal(a, b)
+
+        # a changed source invalidates the cache
+        stat = os.stat(fn)
+        os.utime(fn, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with Trajectory(fn) as traj:
+            assert not isinstance(traj.ds, CacheDataset)
+
+        # static atom types store the atom indices of each type
+        fn = os.path.join(tmp, "staticNC")
+        ds = nc.Dataset(fn, "w")
+        ds.createDimension("frame", None)
+        ds.createDimension("atom", 10)
+        ds.createDimension("spatial", 3)
+        X = np.random.default_rng(0).uniform(0, 5, (3, 10, 3))
+        ds.createVariable("coordinates", "f8", ("frame", "atom", "spatial"))[:] = X
+        types = np.tile([1, 2, 2, 1, 2, 1, 1, 2, 2, 2], (3, 1))
+        ds.createVariable("atom_types", "i4", ("frame", "atom"))[:] = types
+        ds.close()
+
+        convertTrajectory(fn, dtype="float32")
+        with Trajectory(fn) as traj:
+            assert traj.staticTypes
+            assert np.array_equal(traj.typeIndices(2, 1), [0, 3, 5, 6])
+            assert np.allclose(traj.positions(2, 1), X[2, [0, 3, 5, 6]], atol=1e-6)
+
+        # atom types stored once without a frame dimension
+        fn = os.path.join(tmp, "staticAtomNC")
+        ds = nc.Dataset(fn, "w")
+        ds.createDimension("frame", None)
+        ds.createDimension("atom", 10)
+        ds.createDimension("spatial", 3)
+        ds.createVariable("coordinates", "f8", ("frame", "atom", "spatial"))[:] = X
+        ds.createVariable("atom_types", "i4", ("atom",))[:] = types[0]
+        ds.createVariable("cell_lengths", "f8", ("frame", "spatial"))[:] = 5.0
+        ds.close()
+        expected = Coords_to_GR(fn, 2.0, 10, 1)
+
+        convertTrajectory(fn)
+        with Trajectory(fn) as traj:
+            assert isinstance(traj.ds, CacheDataset) and traj.staticTypes
+            assert np.array_equal(traj.ds.typeIndex(1), [0, 3, 5, 6])
+        result = Coords_to_GR(fn, 2.0, 10, 1)
+        for a, b in zip(result, expected):
+            assert np.array_equal(a, b)